@@ -0,0 +1,66 @@
+""" Compare cached dataclass converters with the reflective inspect.signature based ones
+
+    python benchmarks/bench_helpers.py
+"""
+import dataclasses
+import inspect
+import json
+import timeit
+from decimal import Decimal
+from enum import Enum
+
+from kraken_web_api.enums import SubscriptionType
+from kraken_web_api.helpers.helpers import from_dataclass_to_dict, from_dict_to_dataclass
+from kraken_web_api.model.subscription import Subscription, SubscriptionRequest
+from kraken_web_api.subscribe_creator import SubscribtionRequestCreator
+
+
+def reflective_from_dict_to_dataclass(cls, data):
+    dict = {}
+    for key, val in inspect.signature(cls).parameters.items():
+        if val.annotation == Decimal:
+            dict[key] = Decimal(data.get(key, val.default))
+        else:
+            dict[key] = data.get(key, val.default)
+    return cls(**dict)
+
+
+def reflective_from_dataclass_to_dict(instance):
+    result_dict: dict = dict()
+    for key, val in inspect.signature(type(instance)).parameters.items():
+        value = getattr(instance, key)
+        if value is not None:
+            if isinstance(value, Enum):
+                result_dict[key] = value.name
+                continue
+            if dataclasses.is_dataclass(value):
+                result_dict[key] = reflective_from_dataclass_to_dict(value)
+                continue
+            result_dict[key] = value
+    return result_dict
+
+
+def report(name: str, baseline, candidate, number: int = 100_000) -> None:
+    baseline_time = timeit.timeit(baseline, number=number)
+    candidate_time = timeit.timeit(candidate, number=number)
+    print(f"{name:<28} reflective {baseline_time / number * 1e6:8.2f} us"
+          f"   cached {candidate_time / number * 1e6:8.2f} us   x{baseline_time / candidate_time:5.1f}")
+
+
+def main() -> None:
+    request = SubscriptionRequest(event="subscribe",
+                                  subscription=Subscription(name=SubscriptionType.book, depth=10),
+                                  pair=["ETH/BTC"])
+    subscription = {"name": "book", "depth": 10}
+    creator = SubscribtionRequestCreator()
+
+    report("dataclass -> dict", lambda: reflective_from_dataclass_to_dict(request), lambda: from_dataclass_to_dict(request))
+    report("dict -> dataclass", lambda: reflective_from_dict_to_dataclass(Subscription, subscription),
+           lambda: from_dict_to_dataclass(Subscription, subscription))
+    report("subscribe message",
+           lambda: json.dumps(reflective_from_dataclass_to_dict(request)),
+           lambda: creator.create_message(SubscriptionType.book, pair="ETH/BTC", depth=10, subscribe=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+""" Measure import time of the package entry points in fresh interpreters
+
+    python benchmarks/bench_import.py --runs 10
+
+Every statement runs in a new ``python -X importtime`` process, the median cumulative time of the
+imported module and its slowest top level dependencies are reported. Modules already imported by a bare
+interpreter (site and its hooks) are not counted.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+STATEMENTS = [
+    "import kraken_web_api",
+    "import kraken_web_api.websocket",
+    "import kraken_web_api.market_data",
+    "import kraken_web_api.app",
+]
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """ Cumulative import time in microseconds of every module imported by statement """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="number of slowest dependencies to show")
+    args = parser.parse_args()
+
+    startup = set(import_times("pass"))
+    for statement in STATEMENTS:
+        runs: List[Dict[str, int]] = [import_times(statement) for _ in range(args.runs)]
+        module = statement.split()[-1]
+        total = statistics.median(r.get(module, 0) for r in runs)
+        print(f"{statement:40} {total / 1000:8.1f} ms")
+        dependencies = {name: statistics.median(r.get(name, 0) for r in runs)
+                        for name in runs[0] if "." not in name and name != module and name not in startup}
+        for name, value in sorted(dependencies.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {name:36} {value / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
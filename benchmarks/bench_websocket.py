@@ -0,0 +1,96 @@
+""" Drive the real websocket client against a local Kraken simulator
+
+    python benchmarks/bench_websocket.py --pairs 500 --book-rate 100 --duration 10
+
+The simulator runs in a separate process, so it does not compete with the client for the event loop.
+Latency is measured from the level timestamps set by the simulator to the moment the client applied
+the update, both processes share the clock of this machine.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.websocket import WebSocket
+
+
+class MeasuringWebSocket(WebSocket):
+    """ WebSocket recording every handled book update """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.handled = 0
+        self.latencies: List[float] = []
+
+    def _handle_order_book(self, book: OrderBook) -> None:
+        super()._handle_order_book(book)
+        self.handled += 1
+        if book.channelID is None:
+            timestamp = max(p.timestamp for p in book.asks + book.bids)
+            self.latencies.append(time.time() - float(timestamp))
+
+
+def percentile(values: List[float], q: float) -> float:
+    if len(values) == 0:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(args: argparse.Namespace) -> None:
+    simulator = subprocess.Popen(
+        [sys.executable, "-m", "kraken_web_api.simulator", "--port", str(args.port),
+         "--book-rate", str(args.book_rate), "--ticker-rate", "0", "--seed", "1"],
+        stdout=subprocess.PIPE, text=True, env=dict(os.environ))
+    try:
+        assert simulator.stdout is not None
+        simulator.stdout.readline()
+        if args.trace_memory:
+            tracemalloc.start()
+        async with MeasuringWebSocket(socket_uri=f"ws://127.0.0.1:{args.port}", socket_log_level=logging.WARNING) as client:
+            for i in range(args.pairs):
+                await client.subscribe_orders_book(f"P{i}/USD", args.depth)
+            await asyncio.sleep(args.warmup)
+            client.handled = 0
+            client.latencies.clear()
+            started = time.perf_counter()
+            await asyncio.sleep(args.duration)
+            elapsed = time.perf_counter() - started
+            handled, latencies = client.handled, list(client.latencies)
+            _, peak = tracemalloc.get_traced_memory()
+            levels = sum(len(b.asks) + len(b.bids) for b in client.order_books)
+        tracemalloc.stop()
+    finally:
+        simulator.terminate()
+        simulator.wait()
+
+    print(f"pairs {args.pairs}, depth {args.depth}, offered {args.pairs * args.book_rate:.0f} msgs/sec")
+    print(f"throughput   {handled / elapsed:12.0f} msgs/sec ({handled} messages in {elapsed:.1f} s)")
+    print("latency      " + "  ".join(f"p{int(q * 100)} {percentile(latencies, q) * 1000:8.2f} ms" for q in (0.5, 0.9, 0.99))
+          + f"  max {max(latencies, default=float('nan')) * 1000:8.2f} ms")
+    traced = f"traced peak {peak / 2 ** 20:8.1f} MiB, " if args.trace_memory else ""
+    print(f"memory       {traced}max rss {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:8.1f} MiB")
+    print(f"book levels  {levels}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--book-rate", type=float, default=100.0, help="book updates per second per pair")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--trace-memory", action="store_true", help="trace python allocations, slows the client down")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
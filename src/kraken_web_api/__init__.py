@@ -1 +1,45 @@
 __version__ = '0.0.1.dev3'
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from kraken_web_api.market_data import MarketDataClient
+    from kraken_web_api.orders import OrderClient
+    from kraken_web_api.pairs import PairRegistry, pair_registry
+    from kraken_web_api.persistence import StateStore
+    from kraken_web_api.sequencing import BookSequencer
+    from kraken_web_api.websocket import WebSocket
+
+# public names and modules defining them, modules are imported on first attribute access
+_LAZY_ATTRIBUTES = {
+    "BookSequencer": "kraken_web_api.sequencing",
+    "MarketDataClient": "kraken_web_api.market_data",
+    "OrderClient": "kraken_web_api.orders",
+    "PairRegistry": "kraken_web_api.pairs",
+    "pair_registry": "kraken_web_api.pairs",
+    "StateStore": "kraken_web_api.persistence",
+    "WebSocket": "kraken_web_api.websocket",
+}
+
+__all__ = ["BookSequencer", "MarketDataClient", "OrderClient", "PairRegistry", "StateStore", "WebSocket", "pair_registry"]
+
+
+def __getattr__(name: str) -> Any:
+    """ Import public classes and submodules on first access """
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module(module), name)
+    else:
+        try:
+            value = importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
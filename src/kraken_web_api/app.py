@@ -1,43 +1,94 @@
+import argparse
 import asyncio
 import logging
+import signal
+from typing import List, Optional
 
+from kraken_web_api.enums import SubscriptionType
+from kraken_web_api.model.runner_config import RunnerConfig
 from kraken_web_api.websocket import WebSocket
 
+logger = logging.getLogger(__name__)
 
-def on_update():
-    print("ON UPDATE CALLED")
+
+def on_update() -> None:
+    logger.debug("Subscribed channel updated")
 
 
 class Runner:
-    async def start(self):
-        async with WebSocket(socket_log_level=logging.INFO) as self.client:
-            # task_subscribe = asyncio.create_task(self.client.subscribe_orders_book("ETH/BTC", 10, on_update))
-            # await task_subscribe
-            # await asyncio.sleep(3)
-            # await self.client.subscribe_orders_book("ETH/BTC", 10, on_update)
-            # await self.client.subscribe_orders_book("NANO/ETH", 10, on_update)
-            # await self.client.subscribe_orders_book("NANO/BTC", 10, on_update)
-            await self.client.subscribe_ticker_info("XBT/USD", on_update)
-            while True:
-                await asyncio.sleep(0)
-        # self.client = WebSocket(socket_log_level=logging.INFO)
-        # task_connect_public = asyncio.create_task(self.client.subscribe_orders_book(on_update))
-        # await task_connect_public
-        # await asyncio.sleep(10)
-
-    async def stop(self):
-        await self.client.unsubscribe_all()
-        await self.client._disconnect_all()
+    def __init__(self, config: Optional[RunnerConfig] = None) -> None:
+        self.config = config if config is not None else RunnerConfig(pairs=["XBT/USD"])
+        self.client: Optional[WebSocket] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._stop_requested = False
 
+    async def start(self) -> None:
+        """ Subscribe configured channels and wait until stop is requested """
+        self._stop_event = asyncio.Event()
+        if self._stop_requested:
+            self._stop_event.set()
+        socket_log_level = logging.getLevelName(self.config.socket_log_level)
+        async with WebSocket(socket_log_level=socket_log_level) as self.client:
+            await self._subscribe(self.client)
+            await self._stop_event.wait()
 
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG,
+    async def _subscribe(self, client: WebSocket) -> None:
+        """ Subscribe every configured channel for every configured pair """
+        for pair in self.config.pairs:
+            for channel in self.config.channels:
+                if channel == SubscriptionType.book.name:
+                    await client.subscribe_orders_book(pair, self.config.depth, on_update)
+                elif channel == SubscriptionType.ticker.name:
+                    await client.subscribe_ticker_info(pair, on_update)
+                else:
+                    raise NotImplementedError(f"Subscription type [{channel}] is not implemented.")
+
+    def stop(self) -> None:
+        """ Request graceful shutdown, unsubscribing and disconnecting is done by start """
+        self._stop_requested = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+
+def install_uvloop() -> bool:
+    """ Use uvloop event loop policy if it is installed """
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+async def serve(runner: Runner) -> None:
+    """ Run runner until SIGINT or SIGTERM """
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, runner.stop)
+        except (NotImplementedError, RuntimeError):
+            # signal handlers are not supported by windows event loops
+            pass
+    await runner.start()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Kraken websocket client")
+    parser.add_argument("config", nargs="?", help="path to JSON config with pairs and channels")
+    args = parser.parse_args(argv)
+
+    config = RunnerConfig.from_file(args.config) if args.config else RunnerConfig(pairs=["XBT/USD"])
+    logging.basicConfig(level=logging.getLevelName(config.log_level),
                         format='%(asctime)s  %(name)s  %(levelname)s: %(message)s',
                         datefmt='%Y-%m-%d %H:%M:%S')
-    runner = Runner()
+    if config.use_uvloop and install_uvloop():
+        logger.debug("uvloop event loop policy installed")
+    runner = Runner(config)
     try:
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(runner.start())
+        asyncio.run(serve(runner))
     except KeyboardInterrupt:
-        print("keyb interrupt")
-        loop.run_until_complete(runner.stop())
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+""" Vectorized order book analytics over ``OrderBook.to_numpy`` arrays
+
+Book sides are (levels, 2) float64 arrays of [price, volume] ordered best level first.
+Functions return ``nan`` when the book has no levels or not enough liquidity.
+"""
+from typing import Optional
+
+import numpy as np
+
+from kraken_web_api.model.order_book import BookArrays
+
+PRICE = 0
+VOLUME = 1
+
+
+def cumulative_depth(side: np.ndarray) -> np.ndarray:
+    """ Volume available up to and including every level """
+    return np.cumsum(side[:, VOLUME])
+
+
+def cumulative_notional(side: np.ndarray) -> np.ndarray:
+    """ Quote currency amount available up to and including every level """
+    return np.cumsum(side[:, PRICE] * side[:, VOLUME])
+
+
+def vwap_to_size(side: np.ndarray, size: float) -> float:
+    """ Average price of taking ``size`` base volume from the side """
+    filled = _fill(side[:, VOLUME], size)
+    if filled is None:
+        return float("nan")
+    return float(np.dot(filled, side[:, PRICE]) / size)
+
+
+def slippage(side: np.ndarray, notional: float) -> float:
+    """ Relative difference between average fill price of spending ``notional`` quote amount and the best price """
+    if len(side) == 0:
+        return float("nan")
+    spent = _fill(side[:, PRICE] * side[:, VOLUME], notional)
+    if spent is None:
+        return float("nan")
+    average_price = notional / np.sum(spent / side[:, PRICE])
+    best_price = side[0, PRICE]
+    return float(abs(average_price - best_price) / best_price)
+
+
+def imbalance(book: BookArrays, levels: Optional[int] = None) -> float:
+    """ (bid volume - ask volume) / (bid volume + ask volume) over top ``levels`` of both sides """
+    bid_volume = np.sum(book.bids[:levels, VOLUME])
+    ask_volume = np.sum(book.asks[:levels, VOLUME])
+    total = bid_volume + ask_volume
+    if total == 0:
+        return float("nan")
+    return float((bid_volume - ask_volume) / total)
+
+
+def microprice(book: BookArrays) -> float:
+    """ Top of book mid price weighted by volume on the opposite side """
+    if len(book.asks) == 0 or len(book.bids) == 0:
+        return float("nan")
+    ask_price, ask_volume = book.asks[0]
+    bid_price, bid_volume = book.bids[0]
+    return float((ask_price * bid_volume + bid_price * ask_volume) / (ask_volume + bid_volume))
+
+
+def _fill(available: np.ndarray, amount: float) -> Optional[np.ndarray]:
+    """ Amount taken from every level filling ``amount`` best level first, None if levels are not enough """
+    cumulative = np.cumsum(available)
+    if len(cumulative) == 0 or cumulative[-1] < amount:
+        return None
+    return np.clip(amount - (cumulative - available), 0.0, available)
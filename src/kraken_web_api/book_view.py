@@ -0,0 +1,69 @@
+
+from typing import Callable, Iterator, List, Optional, Sequence, overload
+
+from kraken_web_api.model.order_book import BookArrays, OrderBook
+from kraken_web_api.model.price import Price
+
+
+class TopLevels(Sequence[Price]):
+    """ Read-only sequence over the first ``depth`` levels of a book side, levels are not copied """
+    __slots__ = ("_levels", "_depth")
+
+    def __init__(self, levels: List[Price], depth: int) -> None:
+        self._levels = levels
+        self._depth = depth
+
+    def __len__(self) -> int:
+        return min(len(self._levels), self._depth)
+
+    @overload
+    def __getitem__(self, index: int) -> Price: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Price]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._levels[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("level index out of range")
+        return self._levels[index]
+
+    def __iter__(self) -> Iterator[Price]:
+        for i in range(len(self)):
+            yield self._levels[i]
+
+    def __repr__(self) -> str:
+        return f"TopLevels({list(self)!r})"
+
+
+class BookView:
+    """ Read-only view on top ``depth`` levels of an order book shared by all views of the pair
+    ``on_update(view)`` is only invoked when a change lands within the view depth.
+    """
+
+    def __init__(self, pair: str, depth: int, on_update: Optional[Callable] = None) -> None:
+        self.pair = pair
+        self.depth = depth
+        self.on_update = on_update
+        self.book: Optional[OrderBook] = None
+
+    @property
+    def asks(self) -> TopLevels:
+        return TopLevels(self.book.asks if self.book is not None else [], self.depth)
+
+    @property
+    def bids(self) -> TopLevels:
+        return TopLevels(self.book.bids if self.book is not None else [], self.depth)
+
+    def to_numpy(self) -> BookArrays:
+        """ Arrays of the top ``depth`` levels, see ``OrderBook.to_numpy`` """
+        if self.book is None:
+            raise ValueError(f"Order book of {self.pair} has not been received yet")
+        arrays = self.book.to_numpy()
+        return BookArrays(arrays.asks[:self.depth], arrays.bids[:self.depth])
+
+    def __repr__(self) -> str:
+        return f"BookView(pair={self.pair!r}, depth={self.depth})"
@@ -0,0 +1,84 @@
+
+import asyncio
+import functools
+import inspect
+import logging
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Optional, Set
+
+
+class CallbackDispatcher:
+    """ Invoke subscriber callbacks without letting them stall or break the socket read loop
+    Coroutine callbacks run as tasks, at most ``max_pending`` at once, further invocations are dropped
+    until some of them finish. Sync callbacks run inline, or in ``executor`` when one is given.
+    Exceptions and timeouts are logged and never propagate to the caller.
+    """
+
+    def __init__(self, logger: logging.Logger, max_pending: int = 100,
+                 timeout: Optional[float] = None, executor: Optional[Executor] = None) -> None:
+        """
+        Parameters:
+            logger (Logger) : logger failures are reported to
+            max_pending (int) : maximum number of running coroutine or executor callbacks
+            timeout (float) : seconds after which a running callback is abandoned, None for no limit
+            executor (Executor) : executor to run sync callbacks in, None to run them inline
+        """
+        self.logger = logger
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.executor = executor
+        self.dropped = 0
+        self._tasks: Set[asyncio.Future] = set()
+
+    @property
+    def pending(self) -> int:
+        """ Number of callbacks still running """
+        return len(self._tasks)
+
+    def dispatch(self, callback: Callable, *args) -> None:
+        """ Invoke callback, coroutines and executor calls are scheduled and not awaited """
+        if self.executor is not None and not asyncio.iscoroutinefunction(callback):
+            self._schedule(callback, self._run_in_executor(callback, args))
+            return
+        try:
+            result = callback(*args)
+        except Exception:
+            self.logger.exception("Callback %s failed", callback)
+            return
+        if inspect.isawaitable(result):
+            self._schedule(callback, result)
+
+    async def aclose(self, timeout: Optional[float] = None) -> None:
+        """ Wait for running callbacks, the ones still running after timeout are cancelled """
+        if len(self._tasks) == 0:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if len(pending) > 0:
+            await asyncio.wait(pending)
+
+    def _schedule(self, callback: Callable, awaitable: Awaitable) -> None:
+        if len(self._tasks) >= self.max_pending:
+            self.dropped += 1
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            self.logger.warning("Callback %s dropped, %d callbacks are still running", callback, len(self._tasks))
+            return
+        task = asyncio.ensure_future(self._guard(callback, awaitable))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _guard(self, callback: Callable, awaitable: Awaitable) -> None:
+        try:
+            await asyncio.wait_for(awaitable, self.timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning("Callback %s timed out after %s seconds", callback, self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.logger.exception("Callback %s failed", callback)
+
+    async def _run_in_executor(self, callback: Callable, args: tuple) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, functools.partial(callback, *args))
@@ -4,34 +4,69 @@ import urllib.parse
 import hashlib
 import hmac
 import base64
-
-import requests
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from kraken_web_api.constants import API_URI, API_VERSION
+from kraken_web_api.exceptions import KrakenApiError
+from kraken_web_api.helpers.rate_limiter import RateLimiter
 from kraken_web_api.model.api_parameters import ApiParameters
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 class ApiClientBase:
-    def __init__(self, parameters: ApiParameters) -> None:
+    def __init__(self, parameters: Optional[ApiParameters] = None,
+                 max_workers: int = 4, calls_per_second: float = 1.0) -> None:
+        """ Initialise new kraken REST client
+        Parameters:
+            parameters (ApiParameters) : API key and secret, required for private methods only
+            max_workers (int) : number of concurrent requests (and pooled connections)
+            calls_per_second (float) : rate limit shared by all requests of the client, 0 to disable
+        """
         self.parameters = parameters
+        self.uri = API_URI
+        self.apiversion = API_VERSION
+        self._json_options: Dict = {}
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(calls_per_second)
+        # requests is imported by REST clients only, websocket-only processes never load it
+        import requests
+        from requests.adapters import HTTPAdapter
         self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
         self.session.headers.update({
             'User-Agent': 'kraken-web-api/0.0.1.dev3 (https://github.com/myapl/kraken-web-api)'
         })
+        self._nonce_lock = threading.Lock()
+        self._last_nonce = 0
 
     def _nonce(self) -> int:
         """ Nonce counter.
+        Unique even for requests issued within the same millisecond from several threads.
         :returns: an always-increasing unsigned integer (up to 64 bits wide)
         """
-        return int(1000*time.time())
+        with self._nonce_lock:
+            self._last_nonce = max(int(1000*time.time()), self._last_nonce + 1)
+            return self._last_nonce
 
-    def _sign(self, data, urlpath) -> str:
+    def _sign(self, data, urlpath, postdata=None) -> str:
         """ Sign request data according to Kraken's scheme.
         :param data: API request parameters
         :type data: dict
         :param urlpath: API URL path sans host
         :type urlpath: str
+        :param postdata: (optional) encoded request body, url encoded data by default
+        :type postdata: str
         :returns: signature digest
         """
-        postdata = urllib.parse.urlencode(data)
+        if self.parameters is None:
+            raise Exception('API parameters are not set!')
+        if postdata is None:
+            postdata = urllib.parse.urlencode(data)
 
         # Unicode-objects must be encoded before hashing
         encoded = (str(data['nonce']) + postdata).encode()
@@ -43,7 +78,7 @@ class ApiClientBase:
 
         return sigdigest.decode()
 
-    def _query_private(self, method, data=None, timeout=None):
+    def _query_private(self, method, data=None, timeout=None, json_body=False):
         """ Performs an API query that requires a valid key/secret pair.
         :param method: API method name
         :type method: str
@@ -53,18 +88,29 @@ class ApiClientBase:
                         will be thrown after ``timeout`` seconds if a response
                         has not been received
         :type timeout: int or float
+        :param json_body: (optional) send parameters as JSON, required by methods taking nested parameters
+        :type json_body: bool
         :returns: :py:meth:`requests.Response.json`-deserialised Python object
         """
         if data is None:
             data = {}
 
-        if not self.parameters.api_key or not self.parameters.api_secret:
+        if self.parameters is None or not self.parameters.api_key or not self.parameters.api_secret:
             raise Exception('Either key or secret is not set! (Use `load_key()`.')
 
         data['nonce'] = self._nonce()
 
         urlpath = '/' + self.apiversion + '/private/' + method
 
+        if json_body:
+            body = json.dumps(data)
+            headers = {
+                'API-Key': self.parameters.api_key,
+                'API-Sign': self._sign(data, urlpath, body),
+                'Content-Type': 'application/json'
+            }
+            return self._query(urlpath, body, headers, timeout=timeout)
+
         headers = {
             'API-Key': self.parameters.api_key,
             'API-Sign': self._sign(data, urlpath)
@@ -72,6 +118,22 @@ class ApiClientBase:
 
         return self._query(urlpath, data, headers, timeout=timeout)
 
+    def _query_public(self, method, data=None, timeout=None):
+        """ Performs an API query that does not require a valid key/secret pair.
+        :param method: API method name
+        :type method: str
+        :param data: (optional) API request parameters
+        :type data: dict
+        :param timeout: (optional) if not ``None``, a :py:exc:`requests.HTTPError`
+                        will be thrown after ``timeout`` seconds if a response
+                        has not been received
+        :type timeout: int or float
+        :returns: :py:meth:`requests.Response.json`-deserialised Python object
+        """
+        urlpath = '/' + self.apiversion + '/public/' + method
+
+        return self._query(urlpath, data, timeout=timeout)
+
     def _query(self, urlpath, data, headers=None, timeout=None):
         """ Low-level query handling.
         .. note::
@@ -79,8 +141,8 @@ class ApiClientBase:
            unless you have a good reason not to.
         :param urlpath: API URL path sans host
         :type urlpath: str
-        :param data: API request parameters
-        :type data: dict
+        :param data: API request parameters or encoded request body
+        :type data: dict or str
         :param headers: (optional) HTTPS headers
         :type headers: dict
         :param timeout: (optional) if not ``None``, a :py:exc:`requests.HTTPError`
@@ -97,10 +159,29 @@ class ApiClientBase:
 
         url = self.uri + urlpath
 
-        self.response = self.session.post(url, data=data, headers=headers,
-                                          timeout=timeout)
+        self.rate_limiter.acquire()
+        response = self.session.post(url, data=data, headers=headers,
+                                     timeout=timeout)
+        self.response = response
 
-        if self.response.status_code not in (200, 201, 202):
-            self.response.raise_for_status()
+        if response.status_code not in (200, 201, 202):
+            response.raise_for_status()
 
-        return self.response.json(**self._json_options)
+        return response.json(**self._json_options)
+
+    @staticmethod
+    def _result(response: Dict) -> Dict:
+        """ Get result of deserialised API response
+        :raises: :py:exc:`KrakenApiError`: if response contains errors
+        """
+        if response.get('error'):
+            raise KrakenApiError("Kraken API error: %s" % ", ".join(response['error']))
+        return response['result']
+
+    def _map_concurrent(self, function: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """ Apply function to every item using up to ``max_workers`` threads, keeping items order """
+        items = list(items)
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(function, items))
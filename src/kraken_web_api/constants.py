@@ -2,3 +2,6 @@ SOCKET_PUBLIC = "wss://ws.kraken.com/"
 SOCKET_PRIVATE = "wss://ws-auth.kraken.com/"
 API_URI = "https://api.kraken.com"
 API_VERSION = "0"
+BOOK_DEPTHS = (10, 25, 100, 500, 1000)
+# websocket book volumes always have 8 decimals, checksums are computed from those digits
+BOOK_VOLUME_DECIMALS = 8
@@ -25,3 +25,10 @@ class ConnectionStatus(Enum):
 class ChannelStatus(Enum):
     subscribed = auto()
     unsubscribed = auto()
+
+
+class SequenceStatus(Enum):
+    """ State of an order book in the sequencing layer """
+    live = auto()
+    bootstrapping = auto()
+    gap = auto()
@@ -11,3 +11,8 @@ class InvalidJsonException(Exception):
 class BookDataHandlingException(Exception):
     """ Can't handle book data recieved """
     pass
+
+
+class KrakenApiError(Exception):
+    """ Kraken REST API returned an error """
+    pass
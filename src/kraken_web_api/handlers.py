@@ -9,7 +9,7 @@ from kraken_web_api.model.channel import Channel
 from kraken_web_api.model.order_book import OrderBook
 from kraken_web_api.model.price import Price
 from kraken_web_api.model.connection import SocketConnection
-from kraken_web_api.model.ticker import Ticker, TickerData
+from kraken_web_api.model.ticker import LazyTickerData, Ticker
 
 
 class Handler:
@@ -49,18 +49,8 @@ class Handler:
 
     @staticmethod
     def _handle_ticker_data(data_list: List) -> Ticker:
-        data = TickerData(
-            (Decimal(data_list[1]["a"][0]), data_list[1]["a"][1], Decimal(data_list[1]["a"][2])),
-            (Decimal(data_list[1]["b"][0]), data_list[1]["b"][1], Decimal(data_list[1]["b"][2])),
-            (Decimal(data_list[1]["c"][0]), Decimal(data_list[1]["c"][1])),
-            (Decimal(data_list[1]["v"][0]), Decimal(data_list[1]["v"][1])),
-            (Decimal(data_list[1]["p"][0]), Decimal(data_list[1]["p"][1])),
-            (data_list[1]["c"][0], data_list[1]["c"][1]),
-            (Decimal(data_list[1]["l"][0]), Decimal(data_list[1]["l"][1])),
-            (Decimal(data_list[1]["h"][0]), Decimal(data_list[1]["h"][1])),
-            (Decimal(data_list[1]["o"][0]), Decimal(data_list[1]["o"][1]))
-        )
-        return Ticker(data_list[0], data, data_list[-1], data_list[-2])
+        """ Create ticker, fields are decoded on first access """
+        return Ticker(data_list[0], LazyTickerData(data_list[1]), data_list[-2], data_list[-1])
 
     @staticmethod
     def handle_book_data(data_list: List, book: OrderBook) -> OrderBook:
@@ -87,10 +77,14 @@ class Handler:
 
     @staticmethod
     def _update_book(data: List, order_book: OrderBook) -> OrderBook:
-        if "a" in data[1]:
-            order_book.asks = Handler._update_order_book_price(data[1]["a"], order_book.asks)
-        if "b" in data[1]:
-            order_book.bids = Handler._update_order_book_price(data[1]["b"], order_book.bids)
+        # updates of both sides come as two dicts, asks first and then bids with the checksum
+        for update in data[1:-2]:
+            if "a" in update:
+                order_book.asks = Handler._update_order_book_price(update["a"], order_book.asks)
+            if "b" in update:
+                order_book.bids = Handler._update_order_book_price(update["b"], order_book.bids)
+            if "c" in update:
+                order_book.checksum = update["c"]
         order_book.symbol = data[-1]
         order_book.count = data[-2]
         return order_book
@@ -0,0 +1,23 @@
+import zlib
+from decimal import Decimal
+from typing import Sequence, Union
+
+from kraken_web_api.model.price import Price
+
+CHECKSUM_LEVELS = 10
+
+
+def book_checksum(asks: Sequence[Price], bids: Sequence[Price]) -> int:
+    """ Kraken CRC32 checksum of top 10 levels
+    Asks from the lowest price then bids from the highest one, price and volume of every level are
+    concatenated with the decimal point and leading zeros removed.
+    """
+    parts = [_checksum_part(p.price) + _checksum_part(p.volume) for p in asks[:CHECKSUM_LEVELS]]
+    parts += [_checksum_part(p.price) + _checksum_part(p.volume) for p in bids[:CHECKSUM_LEVELS]]
+    return zlib.crc32("".join(parts).encode())
+
+
+def _checksum_part(value: Union[str, Decimal]) -> str:
+    if isinstance(value, Decimal):
+        value = format(value, "f")
+    return value.replace(".", "").lstrip("0")
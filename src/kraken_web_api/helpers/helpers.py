@@ -1,30 +1,110 @@
 import dataclasses
 from decimal import Decimal
 from enum import Enum
-import inspect
-from typing import Dict
+import typing
+from typing import Any, Callable, Dict, Optional
+
+
+_TO_DICT: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
+_FROM_DICT: Dict[type, Callable[[Dict], Any]] = {}
 
 
 def from_dict_to_dataclass(cls, data):
-    dict = {}
-    for key, val in inspect.signature(cls).parameters.items():
-        if val.annotation == Decimal:
-            dict[key] = Decimal(data.get(key, val.default))
-        else:
-            dict[key] = data.get(key, val.default)
-    return cls(**dict)
+    try:
+        converter = _FROM_DICT[cls]
+    except KeyError:
+        converter = _FROM_DICT[cls] = _build_from_dict(cls)
+    return converter(data)
 
 
 def from_dataclass_to_dict(instance) -> Dict[str, str]:
-    result_dict: dict = dict()
-    for key, val in inspect.signature(type(instance)).parameters.items():
-        value = getattr(instance, key)
-        if value is not None:
-            if isinstance(value, Enum):
-                result_dict[key] = value.name
-                continue
-            if dataclasses.is_dataclass(value):
-                result_dict[key] = from_dataclass_to_dict(value)
-                continue
-            result_dict[key] = value
-    return result_dict
+    cls = type(instance)
+    try:
+        converter = _TO_DICT[cls]
+    except KeyError:
+        converter = _TO_DICT[cls] = _build_to_dict(cls)
+    return converter(instance)
+
+
+def _convert_value(value: Any) -> Any:
+    """ Convert value of unknown type into dict value """
+    if isinstance(value, Enum):
+        return value.name
+    if dataclasses.is_dataclass(value):
+        return from_dataclass_to_dict(value)
+    return value
+
+
+def _field_types(cls, unwrap_optional: bool = True) -> Dict[str, Any]:
+    """ Resolve field annotations, optionally unwrapping Optional[...] """
+    try:
+        hints = typing.get_type_hints(cls)
+    except Exception:
+        hints = {}
+    types = {field.name: hints.get(field.name, field.type) for field in dataclasses.fields(cls)}
+    if unwrap_optional:
+        return {name: _unwrap_optional(annotation) for name, annotation in types.items()}
+    return types
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _value_expression(annotation: Any, value: str) -> Optional[str]:
+    """ Expression converting value of known annotation, None when it has to be checked at runtime """
+    if isinstance(annotation, type):
+        if issubclass(annotation, Enum):
+            return f"({value}.name if isinstance({value}, _Enum) else {value})"
+        if dataclasses.is_dataclass(annotation):
+            return f"(_to_dict({value}) if hasattr({value}, '__dataclass_fields__') else {value})"
+        if annotation in (str, int, float, bool, Decimal):
+            return value
+    if typing.get_origin(annotation) in (list, dict, tuple):
+        return value
+    return None
+
+
+def _build_to_dict(cls) -> Callable[[Any], Dict[str, Any]]:
+    """ Generate dataclass to dict converter, equivalent of the reflective one but without inspect calls """
+    field_types = _field_types(cls)
+    lines = ["def to_dict(instance):", "    result = {}"]
+    for field in dataclasses.fields(cls):
+        if not field.init:
+            continue
+        expression = _value_expression(field_types[field.name], "value")
+        lines.append(f"    value = instance.{field.name}")
+        lines.append("    if value is not None:")
+        lines.append(f"        result[{field.name!r}] = {expression or '_convert(value)'}")
+    lines.append("    return result")
+    namespace: Dict[str, Any] = {"_convert": _convert_value, "_to_dict": from_dataclass_to_dict, "_Enum": Enum}
+    exec("\n".join(lines), namespace)
+    return namespace["to_dict"]
+
+
+def _build_from_dict(cls) -> Callable[[Dict], Any]:
+    """ Generate dict to dataclass converter, Decimal fields are converted from strings """
+    field_types = _field_types(cls, unwrap_optional=False)
+    namespace: Dict[str, Any] = {"_cls": cls, "_Decimal": Decimal}
+    arguments = []
+    for field in dataclasses.fields(cls):
+        if not field.init:
+            continue
+        if field.default is not dataclasses.MISSING:
+            namespace[f"_default_{field.name}"] = field.default
+            value = f"data.get({field.name!r}, _default_{field.name})"
+        elif field.default_factory is not dataclasses.MISSING:  # type: ignore
+            namespace[f"_factory_{field.name}"] = field.default_factory  # type: ignore
+            value = f"(data[{field.name!r}] if {field.name!r} in data else _factory_{field.name}())"
+        else:
+            value = f"data[{field.name!r}]"
+        if field_types[field.name] is Decimal:
+            value = f"_Decimal({value})"
+        arguments.append(f"{field.name}={value}")
+    source = "def from_dict(data):\n    return _cls(" + ", ".join(arguments) + ")"
+    exec(source, namespace)
+    return namespace["from_dict"]
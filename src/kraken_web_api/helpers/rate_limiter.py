@@ -0,0 +1,56 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """ Thread safe limiter spacing calls evenly to a given rate """
+
+    def __init__(self, calls_per_second: float) -> None:
+        self.interval = 1.0 / calls_per_second if calls_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+
+    def acquire(self) -> None:
+        """ Block until the next call is allowed """
+        if self.interval == 0.0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class DecayingCounter:
+    """ Thread safe model of Kraken private API call counter
+    Every call adds its cost to the counter which decays at a constant rate, a call that would take the counter
+    over its maximum waits until enough of it has decayed.
+    """
+
+    def __init__(self, max_count: float, decay_per_second: float) -> None:
+        """
+        Parameters:
+            max_count (float) : counter maximum of the account tier, 0 to disable
+            decay_per_second (float) : counter decrease per second of the account tier
+        """
+        self.max_count = max_count
+        self.decay_per_second = decay_per_second
+        self._lock = threading.Lock()
+        self._count = 0.0
+        self._updated = time.monotonic()
+
+    def acquire(self, cost: float = 1) -> None:
+        """ Block until a call of the given cost keeps the counter within its maximum """
+        if self.max_count <= 0 or cost <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._count = max(0.0, self._count - (now - self._updated) * self.decay_per_second)
+                self._updated = now
+                excess = self._count + cost - max(self.max_count, cost)
+                if excess <= 0:
+                    self._count += cost
+                    return
+            time.sleep(excess / self.decay_per_second)
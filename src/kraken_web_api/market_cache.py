@@ -0,0 +1,191 @@
+
+import json
+import os
+import struct
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+TRADE_DTYPE = np.dtype([
+    ("price", "<f8"),
+    ("volume", "<f8"),
+    ("time", "<f8"),
+    ("side", "S1"),
+    ("ordertype", "S1"),
+])
+
+OHLC_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("vwap", "<f8"),
+    ("volume", "<f8"),
+    ("count", "<i8"),
+])
+
+SECONDS_PER_DAY = 86400
+# fixed .npy header size of trade files, rows are appended behind it and only the shape in the header is rewritten
+TRADES_HEADER_SIZE = 256
+
+
+class MarketDataCache:
+    """ On-disk columnar cache of REST market data
+    Rows are stored as one structured NumPy ``.npy`` file per pair and UTC day, next to a ``cursor.json``
+    holding the ``since`` value to resume from. Files are read back memory mapped.
+    Trade pages are appended to the day files in place. The cursor also records the number of rows of every
+    day file, rows past it were written by a page whose cursor was never stored and are dropped before the
+    page is fetched and appended again.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+
+    def trades_cursor(self, pair: str) -> Optional[str]:
+        """ ``since`` value following the last cached trade """
+        return self._read_cursor(self._trades_dir(pair))
+
+    def write_trades(self, pair: str, rows: List, cursor: str) -> int:
+        """ Append Kraken ``Trades`` rows and store the cursor of the next page """
+        array = np.array([(r[0], r[1], r[2], r[3], r[4]) for r in rows], dtype=TRADE_DTYPE)
+        directory = self._trades_dir(pair)
+        os.makedirs(directory, exist_ok=True)
+        days = (array["time"] // SECONDS_PER_DAY).astype("<i8")
+        with self._lock:
+            sizes: Dict[str, int] = self._read_cursor_data(directory).get("rows", {})
+            for day in np.unique(days):
+                name = _day_name(int(day))
+                path = os.path.join(directory, name + ".npy")
+                sizes[name] = _append_rows(path, array[days == day], sizes.get(name, 0))
+            self._write_cursor(directory, cursor, rows=sizes)
+        return len(array)
+
+    def read_trades(self, pair: str, day: str) -> np.ndarray:
+        """ Memory mapped trades of a single UTC day (``YYYY-MM-DD``) """
+        return self._read_day(self._trades_dir(pair), day, TRADE_DTYPE)
+
+    def trade_days(self, pair: str) -> List[str]:
+        """ UTC days with cached trades """
+        return self._days(self._trades_dir(pair))
+
+    def ohlc_cursor(self, pair: str, interval: int) -> Optional[str]:
+        """ ``since`` value following the last committed cached candle """
+        return self._read_cursor(self._ohlc_dir(pair, interval))
+
+    def write_ohlc(self, pair: str, interval: int, rows: List, cursor: str) -> int:
+        """ Merge Kraken ``OHLC`` rows, candles already cached for the same time are replaced """
+        array = np.array([tuple(r) for r in rows], dtype=OHLC_DTYPE)
+        directory = self._ohlc_dir(pair, interval)
+        self._merge_by_day(directory, array, array["time"], "time")
+        self._write_cursor(directory, cursor)
+        return len(array)
+
+    def read_ohlc(self, pair: str, interval: int, day: str) -> np.ndarray:
+        """ Memory mapped candles of a single UTC day (``YYYY-MM-DD``) """
+        return self._read_day(self._ohlc_dir(pair, interval), day, OHLC_DTYPE)
+
+    def ohlc_days(self, pair: str, interval: int) -> List[str]:
+        """ UTC days with cached candles """
+        return self._days(self._ohlc_dir(pair, interval))
+
+    def _trades_dir(self, pair: str) -> str:
+        return os.path.join(self.root, "trades", _pair_dirname(pair))
+
+    def _ohlc_dir(self, pair: str, interval: int) -> str:
+        return os.path.join(self.root, "ohlc", str(interval), _pair_dirname(pair))
+
+    def _merge_by_day(self, directory: str, array: np.ndarray, times: np.ndarray, unique: str) -> None:
+        """ Merge rows into day files rewriting them, used for candles where a day holds at most 1440 rows """
+        if len(array) == 0:
+            return
+        os.makedirs(directory, exist_ok=True)
+        days = (times // SECONDS_PER_DAY).astype("<i8")
+        with self._lock:
+            for day in np.unique(days):
+                path = os.path.join(directory, _day_name(int(day)) + ".npy")
+                chunk = array[days == day]
+                if os.path.exists(path):
+                    chunk = np.concatenate([np.load(path), chunk])
+                # keep the latest row for every key, candles of the open interval are updated by Kraken
+                _, index = np.unique(chunk[unique][::-1], return_index=True)
+                _save_atomic(path, chunk[::-1][index])
+
+    def _read_day(self, directory: str, day: str, dtype: np.dtype) -> np.ndarray:
+        path = os.path.join(directory, day + ".npy")
+        if not os.path.exists(path):
+            return np.empty(0, dtype=dtype)
+        return np.load(path, mmap_mode="r")
+
+    @staticmethod
+    def _days(directory: str) -> List[str]:
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith(".npy"))
+
+    @classmethod
+    def _read_cursor(cls, directory: str) -> Optional[str]:
+        return cls._read_cursor_data(directory).get("since")
+
+    @staticmethod
+    def _read_cursor_data(directory: str) -> Dict:
+        path = os.path.join(directory, "cursor.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    @staticmethod
+    def _write_cursor(directory: str, cursor: str, rows: Optional[Dict[str, int]] = None) -> None:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "cursor.json")
+        data: Dict = {"since": str(cursor)}
+        if rows is not None:
+            data["rows"] = rows
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(path + ".tmp", path)
+
+
+def _pair_dirname(pair: str) -> str:
+    return pair.replace("/", "_")
+
+
+def _day_name(day: int) -> str:
+    return datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _save_atomic(path: str, array: np.ndarray) -> None:
+    with open(path + ".tmp", "wb") as file:
+        np.save(file, array)
+    os.replace(path + ".tmp", path)
+
+
+def _append_rows(path: str, array: np.ndarray, committed: int) -> int:
+    """ Append rows behind the ``committed`` ones of a day file and update its header
+    :returns: number of rows in the file
+    """
+    exists = os.path.exists(path)
+    if not exists:
+        committed = 0
+    end = TRADES_HEADER_SIZE + committed * array.dtype.itemsize
+    with open(path, "r+b" if exists else "w+b") as file:
+        file.truncate(end)
+        file.seek(end)
+        file.write(array.tobytes())
+        rows = committed + len(array)
+        file.seek(0)
+        file.write(_npy_header(array.dtype, rows))
+    return rows
+
+
+def _npy_header(dtype: np.dtype, rows: int) -> bytes:
+    """ Version 1.0 ``.npy`` header padded to ``TRADES_HEADER_SIZE`` bytes """
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)})
+    length = TRADES_HEADER_SIZE - len(np.lib.format.MAGIC_PREFIX) - 4
+    if len(header) >= length:
+        raise ValueError(f"Header of {dtype} does not fit into {TRADES_HEADER_SIZE} bytes")
+    return np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + struct.pack("<H", length) + (header.ljust(length - 1) + "\n").encode("latin1")
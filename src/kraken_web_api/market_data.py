@@ -0,0 +1,109 @@
+
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from kraken_web_api.client_base import ApiClientBase
+from kraken_web_api.model.api_parameters import ApiParameters
+
+if TYPE_CHECKING:
+    from kraken_web_api.market_cache import MarketDataCache
+
+TRADES_PAGE_SIZE = 1000
+
+
+class MarketDataClient(ApiClientBase):
+    """ Public REST market data: order book depth, trades and OHLC
+    Requests for many pairs are sent concurrently, all of them sharing the client rate limit.
+    """
+
+    def __init__(self, parameters: Optional[ApiParameters] = None,
+                 max_workers: int = 4, calls_per_second: float = 1.0,
+                 cache: Optional["MarketDataCache"] = None) -> None:
+        """ Initialise new kraken market data client
+        Parameters:
+            cache (MarketDataCache) : on-disk cache backfills are written to and resumed from
+        """
+        super().__init__(parameters, max_workers, calls_per_second)
+        self.cache = cache
+
+    def depth(self, pair: str, count: int = 100) -> Dict[str, List]:
+        """ Order book of a pair, dict with 'asks' and 'bids' lists of [price, volume, timestamp] """
+        result = self._result(self._query_public('Depth', {'pair': pair, 'count': count}))
+        return _pair_result(result)
+
+    def depth_many(self, pairs: Sequence[str], count: int = 100) -> Dict[str, Dict[str, List]]:
+        """ Order books of many pairs fetched concurrently """
+        books = self._map_concurrent(lambda pair: self.depth(pair, count), pairs)
+        return dict(zip(pairs, books))
+
+    def trades(self, pair: str, since: Optional[str] = None) -> Tuple[List[List], str]:
+        """ Single page of recent trades and the ``since`` cursor of the next page """
+        data = {'pair': pair}
+        if since is not None:
+            data['since'] = since
+        result = self._result(self._query_public('Trades', data))
+        return _pair_result(result), str(result['last'])
+
+    def iter_trades(self, pair: str, since: Optional[str] = None,
+                    until: Optional[float] = None) -> Iterator[Tuple[List[List], str]]:
+        """ Follow ``since`` cursors yielding pages of trades with the cursor following each page
+        Parameters:
+            since (str) : cursor to start from, None for the most recent trades
+            until (float) : stop after a page reaching this unix time
+        """
+        while True:
+            rows, last = self.trades(pair, since)
+            if len(rows) > 0:
+                yield rows, last
+            if len(rows) < TRADES_PAGE_SIZE or last == since:
+                return
+            if until is not None and float(rows[-1][2]) >= until:
+                return
+            since = last
+
+    def backfill_trades(self, pairs: Sequence[str], since: Optional[str] = None,
+                        until: Optional[float] = None) -> Dict[str, int]:
+        """ Fetch trades of many pairs concurrently into the cache, resuming from cached cursors
+        :returns: number of new trades per pair
+        """
+        cache = self._require_cache()
+
+        def backfill(pair: str) -> int:
+            count = 0
+            cursor = cache.trades_cursor(pair) or since
+            for rows, last in self.iter_trades(pair, cursor, until):
+                count += cache.write_trades(pair, rows, last)
+            return count
+        return dict(zip(pairs, self._map_concurrent(backfill, pairs)))
+
+    def ohlc(self, pair: str, interval: int = 1, since: Optional[str] = None) -> Tuple[List[List], str]:
+        """ Candles of a pair and the ``since`` cursor of the next committed candle """
+        data = {'pair': pair, 'interval': interval}
+        if since is not None:
+            data['since'] = since
+        result = self._result(self._query_public('OHLC', data))
+        return _pair_result(result), str(result['last'])
+
+    def backfill_ohlc(self, pairs: Sequence[str], interval: int = 1) -> Dict[str, int]:
+        """ Fetch candles of many pairs concurrently into the cache, resuming from cached cursors
+        Kraken only serves the latest 720 candles of an interval, so there is a single page per pair.
+        :returns: number of fetched candles per pair
+        """
+        cache = self._require_cache()
+
+        def backfill(pair: str) -> int:
+            rows, last = self.ohlc(pair, interval, cache.ohlc_cursor(pair, interval))
+            return cache.write_ohlc(pair, interval, rows, last)
+        return dict(zip(pairs, self._map_concurrent(backfill, pairs)))
+
+    def _require_cache(self) -> "MarketDataCache":
+        if self.cache is None:
+            raise ValueError("Market data cache is not set")
+        return self.cache
+
+
+def _pair_result(result: Dict):
+    """ Kraken keys results by its own pair name, which may differ from the requested one """
+    for key, value in result.items():
+        if key != 'last':
+            return value
+    raise KeyError("Pair is missing in Kraken response")
@@ -0,0 +1,48 @@
+
+from typing import List
+
+import numpy as np
+
+from kraken_web_api.model.price import Price
+
+PRICE = 0
+VOLUME = 1
+
+
+class BookSideArray:
+    """ Contiguous (levels, 2) float64 array of [price, volume], ordered best level first
+    Kept in sync with an order book side level by level, inserts and deletes shift the tail in place.
+    """
+
+    def __init__(self, levels: List[Price]) -> None:
+        self._size = len(levels)
+        self._data = np.empty((max(2 * self._size, 16), 2), dtype=np.float64)
+        if self._size > 0:
+            self._data[:self._size] = [(float(p.price), float(p.volume)) for p in levels]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def array(self) -> np.ndarray:
+        """ Read-only view on current levels, valid until the next book update """
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def insert(self, index: int, price: float, volume: float) -> None:
+        if self._size == len(self._data):
+            self._data = np.concatenate([self._data, np.empty_like(self._data)])
+        self._data[index + 1:self._size + 1] = self._data[index:self._size]
+        self._data[index] = (price, volume)
+        self._size += 1
+
+    def update(self, index: int, volume: float) -> None:
+        self._data[index, VOLUME] = volume
+
+    def delete(self, index: int) -> None:
+        self._data[index:self._size - 1] = self._data[index + 1:self._size]
+        self._size -= 1
+
+    def truncate(self, size: int) -> None:
+        self._size = min(self._size, size)
@@ -1,10 +1,12 @@
 
 from dataclasses import dataclass
-from typing import Dict
-from websockets.client import WebSocketClientProtocol
+from typing import TYPE_CHECKING, Dict, Optional
 
 from kraken_web_api.enums import ConnectionStatus
 
+if TYPE_CHECKING:
+    from websockets.client import WebSocketClientProtocol
+
 
 @dataclass(unsafe_hash=True)
 class SocketConnection:
@@ -12,7 +14,7 @@ class SocketConnection:
     event: str
     status: ConnectionStatus
     version: str
-    websocket: WebSocketClientProtocol
+    websocket: Optional["WebSocketClientProtocol"] = None
     is_private: bool = False
 
     @staticmethod
@@ -22,5 +24,4 @@ class SocketConnection:
             event=dict['event'],
             status=ConnectionStatus[dict['status']],
             version=dict['version'],
-            websocket=WebSocketClientProtocol()
         )
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional
+
+
+@dataclass(unsafe_hash=True)
+class OrderRequest:
+    """ Order of AddOrder / AddOrderBatch, field names follow Kraken parameters """
+    type: str
+    ordertype: str
+    volume: str
+    price: Optional[str] = None
+    price2: Optional[str] = None
+    leverage: Optional[str] = None
+    oflags: Optional[str] = None
+    timeinforce: Optional[str] = None
+    userref: Optional[int] = None
+
+
+@dataclass(unsafe_hash=True)
+class OrderRecord:
+    """ Open or closed order """
+    txid: str
+    pair: str
+    type: str
+    ordertype: str
+    price: Decimal
+    volume: Decimal
+    vol_exec: Decimal
+    status: str
+    opentm: float
+    closetm: Optional[float] = None
+    userref: Optional[int] = None
+
+    @staticmethod
+    def from_dict(txid: str, dict: Dict):
+        descr = dict['descr']
+        return OrderRecord(
+            txid=txid,
+            pair=descr['pair'],
+            type=descr['type'],
+            ordertype=descr['ordertype'],
+            price=Decimal(descr['price']),
+            volume=Decimal(dict['vol']),
+            vol_exec=Decimal(dict['vol_exec']),
+            status=dict['status'],
+            opentm=float(dict['opentm']),
+            closetm=float(dict['closetm']) if 'closetm' in dict else None,
+            userref=dict.get('userref'),
+        )
+
+
+@dataclass(unsafe_hash=True)
+class TradeRecord:
+    """ Own trade from TradesHistory """
+    txid: str
+    ordertxid: str
+    pair: str
+    time: float
+    type: str
+    ordertype: str
+    price: Decimal
+    cost: Decimal
+    fee: Decimal
+    vol: Decimal
+
+    @staticmethod
+    def from_dict(txid: str, dict: Dict):
+        return TradeRecord(
+            txid=txid,
+            ordertxid=dict['ordertxid'],
+            pair=dict['pair'],
+            time=float(dict['time']),
+            type=dict['type'],
+            ordertype=dict['ordertype'],
+            price=Decimal(dict['price']),
+            cost=Decimal(dict['cost']),
+            fee=Decimal(dict['fee']),
+            vol=Decimal(dict['vol']),
+        )
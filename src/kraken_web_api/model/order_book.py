@@ -1,8 +1,20 @@
+import sys
 from dataclasses import dataclass, field
-from typing import List, Optional
+from decimal import Decimal
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
 
 from kraken_web_api.model.price import Price
 
+if TYPE_CHECKING:
+    import numpy as np
+    from kraken_web_api.model.book_side import BookSideArray
+
+
+class BookArrays(NamedTuple):
+    """ Order book sides as (levels, 2) float64 arrays of [price, volume], best level first """
+    asks: "np.ndarray"
+    bids: "np.ndarray"
+
 
 @dataclass(unsafe_hash=True)
 class OrderBook:
@@ -11,3 +23,93 @@ class OrderBook:
     symbol: Optional[str] = None
     asks: List[Price] = field(default_factory=list)
     bids: List[Price] = field(default_factory=list)
+    checksum: Optional[str] = field(default=None, compare=False)
+    updated: Optional[float] = field(default=None, compare=False)
+    provisional: bool = field(default=False, compare=False)
+    _asks_array: Optional["BookSideArray"] = field(default=None, init=False, repr=False, compare=False)
+    _bids_array: Optional["BookSideArray"] = field(default=None, init=False, repr=False, compare=False)
+
+    def update_asks(self, prices: List[Price]) -> int:
+        """ Apply ask levels update, asks are kept in ascending price order
+        :returns: index of the best changed level, ``sys.maxsize`` when nothing changed
+        """
+        return self._update_levels(self.asks, self._asks_array, prices, False)
+
+    def update_bids(self, prices: List[Price]) -> int:
+        """ Apply bid levels update, bids are kept in descending price order
+        :returns: index of the best changed level, ``sys.maxsize`` when nothing changed
+        """
+        return self._update_levels(self.bids, self._bids_array, prices, True)
+
+    def level(self, price: Decimal, is_ask: bool) -> Optional[Price]:
+        """ Level of given price on one of the sides, None when there is no such level """
+        levels = self.asks if is_ask else self.bids
+        index = _find_level(levels, price, not is_ask)
+        if index < len(levels) and levels[index].price == price:
+            return levels[index]
+        return None
+
+    def truncate(self, depth: int) -> None:
+        """ Drop levels beyond subscribed depth, Kraken does not send deletes for them """
+        del self.asks[depth:]
+        del self.bids[depth:]
+        if self._asks_array is not None and self._bids_array is not None:
+            self._asks_array.truncate(depth)
+            self._bids_array.truncate(depth)
+
+    @property
+    def depth(self) -> Optional[int]:
+        """ Subscribed depth parsed from channel name (``book-10``) """
+        if self.count is None or not self.count.startswith("book-"):
+            return None
+        return int(self.count[5:])
+
+    def to_numpy(self) -> BookArrays:
+        """ Price and volume arrays of both sides (requires numpy)
+        Arrays are built on the first call and then kept in sync by ``update_asks``/``update_bids``,
+        returned views are read-only and valid until the next update.
+        """
+        if self._asks_array is None or self._bids_array is None:
+            from kraken_web_api.model.book_side import BookSideArray
+            self._asks_array = BookSideArray(self.asks)
+            self._bids_array = BookSideArray(self.bids)
+        return BookArrays(self._asks_array.array, self._bids_array.array)
+
+    @staticmethod
+    def _update_levels(levels: List[Price], array: Optional["BookSideArray"],
+                       prices: List[Price], descending: bool) -> int:
+        changed = sys.maxsize
+        for new_price in prices:
+            index = _find_level(levels, new_price.price, descending)
+            found = index < len(levels) and levels[index].price == new_price.price
+            if new_price.volume == 0:
+                if found:
+                    del levels[index]
+                    changed = min(changed, index)
+                    if array is not None:
+                        array.delete(index)
+                continue
+            changed = min(changed, index)
+            if found:
+                levels[index].volume = new_price.volume
+                levels[index].timestamp = new_price.timestamp
+                if array is not None:
+                    array.update(index, float(new_price.volume))
+            else:
+                levels.insert(index, new_price)
+                if array is not None:
+                    array.insert(index, float(new_price.price), float(new_price.volume))
+        return changed
+
+
+def _find_level(levels: List[Price], price: Decimal, descending: bool) -> int:
+    """ Index of the level with given price or of the position to insert it """
+    low, high = 0, len(levels)
+    while low < high:
+        middle = (low + high) // 2
+        level_price = levels[middle].price
+        if (level_price > price) if descending else (level_price < price):
+            low = middle + 1
+        else:
+            high = middle
+    return low
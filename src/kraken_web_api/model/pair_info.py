@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict
+
+
+@dataclass(unsafe_hash=True)
+class PairInfo:
+    """ Trading pair metadata from Kraken AssetPairs """
+    id: int
+    name: str
+    key: str
+    altname: str
+    base: str
+    quote: str
+    pair_decimals: int
+    lot_decimals: int
+    tick_size: Decimal
+
+    @staticmethod
+    def from_dict(id: int, key: str, dict: Dict):
+        pair_decimals = int(dict['pair_decimals'])
+        return PairInfo(
+            id=id,
+            name=dict.get('wsname') or dict['altname'],
+            key=key,
+            altname=dict['altname'],
+            base=dict['base'],
+            quote=dict['quote'],
+            pair_decimals=pair_decimals,
+            lot_decimals=int(dict['lot_decimals']),
+            tick_size=Decimal(dict.get('tick_size') or Decimal(1).scaleb(-pair_decimals)),
+        )
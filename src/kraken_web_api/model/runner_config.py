@@ -0,0 +1,42 @@
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from kraken_web_api.enums import SubscriptionType
+
+# channels the runner knows how to subscribe
+RUNNER_CHANNELS = (SubscriptionType.book.name, SubscriptionType.ticker.name)
+
+
+@dataclass(unsafe_hash=True)
+class RunnerConfig:
+    """ Pairs and channels the runner subscribes to """
+    pairs: List[str] = field(default_factory=list)
+    channels: List[str] = field(default_factory=lambda: ["ticker"])
+    depth: int = 10
+    log_level: str = "INFO"
+    socket_log_level: str = "INFO"
+    use_uvloop: bool = True
+
+    @staticmethod
+    def from_dict(dict: Dict):
+        """ Build config from dict, unknown channels raise ValueError before anything connects """
+        channels = list(dict.get('channels', ["ticker"]))
+        unknown = [c for c in channels if c not in RUNNER_CHANNELS]
+        if len(unknown) > 0:
+            raise ValueError(f"Unsupported channels {unknown}, expected some of {list(RUNNER_CHANNELS)}")
+        return RunnerConfig(
+            pairs=list(dict.get('pairs', [])),
+            channels=channels,
+            depth=int(dict.get('depth', 10)),
+            log_level=dict.get('log_level', "INFO"),
+            socket_log_level=dict.get('socket_log_level', "INFO"),
+            use_uvloop=bool(dict.get('use_uvloop', True)),
+        )
+
+    @staticmethod
+    def from_file(path: str):
+        """ Load config from JSON file """
+        with open(path, encoding="utf-8") as file:
+            return RunnerConfig.from_dict(json.load(file))
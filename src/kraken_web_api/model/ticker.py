@@ -1,7 +1,8 @@
 
+import dataclasses
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Tuple
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 
 @dataclass(unsafe_hash=True)
@@ -17,9 +18,69 @@ class TickerData:
     open_price: Tuple[Decimal, Decimal]
 
 
+class _LazyField:
+    """ Ticker field parsed from raw data on first access """
+
+    def __init__(self, key: str, parsers: Tuple[Optional[Callable], ...]) -> None:
+        self.key = key
+        self.parsers = parsers
+        self.name = key
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner=None) -> Any:
+        if instance is None:
+            return self
+        cache = instance._cache
+        if self.name in cache:
+            return cache[self.name]
+        raw = instance._raw[self.key]
+        value = tuple(v if parser is None else parser(v) for parser, v in zip(self.parsers, raw))
+        cache[self.name] = value
+        return value
+
+
+class LazyTickerData:
+    """ TickerData compatible view over raw ticker message, fields are parsed on demand """
+    __slots__ = ("_raw", "_cache")
+
+    ask = _LazyField("a", (Decimal, None, Decimal))
+    bid = _LazyField("b", (Decimal, None, Decimal))
+    close = _LazyField("c", (Decimal, Decimal))
+    volume = _LazyField("v", (Decimal, Decimal))
+    average_price = _LazyField("p", (Decimal, Decimal))
+    trades = _LazyField("t", (None, None))
+    low_price = _LazyField("l", (Decimal, Decimal))
+    high_price = _LazyField("h", (Decimal, Decimal))
+    open_price = _LazyField("o", (Decimal, Decimal))
+
+    def __init__(self, raw: Dict) -> None:
+        self._raw = raw
+        self._cache: Dict[str, Any] = {}
+
+    def to_ticker_data(self) -> TickerData:
+        """ Parse all fields and return eager TickerData """
+        return TickerData(*self._values())
+
+    def _values(self) -> Tuple:
+        return tuple(getattr(self, f.name) for f in dataclasses.fields(TickerData))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (LazyTickerData, TickerData)):
+            return self._values() == tuple(getattr(other, f.name) for f in dataclasses.fields(TickerData))
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._values())
+
+    def __repr__(self) -> str:
+        return f"LazyTickerData({self._raw!r})"
+
+
 @dataclass(unsafe_hash=True)
 class Ticker:
     channelID: int
-    data: TickerData
+    data: Union[TickerData, LazyTickerData]
     channelName: str
     pair: str
@@ -0,0 +1,164 @@
+
+from typing import Dict, List, Optional, Sequence, TypeVar
+
+from kraken_web_api.client_base import ApiClientBase
+from kraken_web_api.helpers.helpers import from_dataclass_to_dict
+from kraken_web_api.helpers.rate_limiter import DecayingCounter
+from kraken_web_api.model.api_parameters import ApiParameters
+from kraken_web_api.model.order import OrderRecord, OrderRequest, TradeRecord
+
+ADD_ORDER_BATCH_SIZE = 15
+# AddOrderBatch rejects batches of a single order
+ADD_ORDER_BATCH_MIN = 2
+CANCEL_ORDER_BATCH_SIZE = 50
+
+# private API call counter of the starter tier, higher tiers allow 20 decaying by 0.5 or 1 per second
+API_COUNTER_MAX = 15
+API_COUNTER_DECAY = 0.33
+# history calls cost 2, order placement and cancellation are limited by the trading engine instead
+API_CALL_COSTS = {'ClosedOrders': 2, 'TradesHistory': 2, 'AddOrder': 0, 'AddOrderBatch': 0,
+                  'CancelOrder': 0, 'CancelOrderBatch': 0, 'CancelAll': 0}
+
+T = TypeVar("T")
+
+
+class OrderClient(ApiClientBase):
+    """ Private REST order management
+    Independent calls (batches of a ladder, pages of history) can be sent concurrently over pooled connections.
+    Concurrent private calls may reach Kraken out of nonce order, so ``max_workers`` above 1 needs an API key
+    with a nonce window. Calls wait for Kraken's private call counter, modelled with the account tier limits.
+    """
+
+    def __init__(self, parameters: ApiParameters, max_workers: int = 1, calls_per_second: float = 0,
+                 counter_max: float = API_COUNTER_MAX, counter_decay: float = API_COUNTER_DECAY) -> None:
+        """
+        Parameters:
+            parameters (ApiParameters) : API key and secret
+            max_workers (int) : number of concurrent requests, above 1 requires a nonce window on the API key
+            calls_per_second (float) : additional even spacing of all requests, 0 to disable
+            counter_max (float) : private call counter maximum of the account tier, 0 to disable
+            counter_decay (float) : private call counter decrease per second of the account tier
+        """
+        super().__init__(parameters, max_workers, calls_per_second)
+        self.counter = DecayingCounter(counter_max, counter_decay)
+
+    def add_order(self, pair: str, order: OrderRequest, validate: bool = False) -> List[str]:
+        """ Place single order
+        :returns: transaction ids of the order
+        """
+        data: Dict = from_dataclass_to_dict(order)
+        data['pair'] = pair
+        if validate:
+            data['validate'] = True
+        return self._private('AddOrder', data).get('txid', [])
+
+    def add_order_batch(self, pair: str, orders: Sequence[OrderRequest], validate: bool = False) -> List[str]:
+        """ Place orders of a pair using AddOrderBatch, balanced batches of up to 15 orders are sent concurrently
+        A single order is placed with AddOrder.
+        :returns: transaction ids in the order of ``orders``
+        """
+        if len(orders) == 0:
+            return []
+        if len(orders) < ADD_ORDER_BATCH_MIN:
+            return [txid for order in orders for txid in self.add_order(pair, order, validate)]
+        batches = _balanced_batches(orders, ADD_ORDER_BATCH_SIZE)
+
+        def add(batch: Sequence[OrderRequest]) -> List[str]:
+            data: Dict = {'pair': pair, 'orders': [from_dataclass_to_dict(o) for o in batch]}
+            if validate:
+                data['validate'] = True
+            result = self._private('AddOrderBatch', data, json_body=True)
+            return [o.get('txid', '') for o in result['orders']]
+        return [txid for txids in self._map_concurrent(add, batches) for txid in txids]
+
+    def cancel_order(self, txid: str) -> int:
+        """ Cancel order by transaction id or userref
+        :returns: number of cancelled orders
+        """
+        return int(self._private('CancelOrder', {'txid': txid})['count'])
+
+    def cancel_order_batch(self, txids: Sequence[str]) -> int:
+        """ Cancel orders using CancelOrderBatch, batches of 50 orders are sent concurrently
+        :returns: number of cancelled orders
+        """
+        batches = [txids[i:i + CANCEL_ORDER_BATCH_SIZE] for i in range(0, len(txids), CANCEL_ORDER_BATCH_SIZE)]
+
+        def cancel(batch: Sequence[str]) -> int:
+            result = self._private('CancelOrderBatch', {'orders': list(batch)}, json_body=True)
+            return int(result['count'])
+        return sum(self._map_concurrent(cancel, batches))
+
+    def cancel_all(self) -> int:
+        """ Cancel all open orders
+        :returns: number of cancelled orders
+        """
+        return int(self._private('CancelAll')['count'])
+
+    def replace_ladder(self, pair: str, orders: Sequence[OrderRequest],
+                       cancel_txids: Sequence[str] = (), validate: bool = False) -> List[str]:
+        """ Cancel orders of the previous ladder and place the new one
+        Takes two round trips: one for the cancel batch, then all add batches concurrently.
+        :returns: transaction ids of the new orders
+        """
+        if len(cancel_txids) > 0 and not validate:
+            self.cancel_order_batch(cancel_txids)
+        return self.add_order_batch(pair, orders, validate)
+
+    def open_orders(self, userref: Optional[int] = None) -> List[OrderRecord]:
+        """ All open orders """
+        data = {} if userref is None else {'userref': userref}
+        result = self._private('OpenOrders', data)
+        return [OrderRecord.from_dict(txid, order) for txid, order in result['open'].items()]
+
+    def closed_orders(self, start: Optional[float] = None, end: Optional[float] = None) -> List[OrderRecord]:
+        """ Closed orders, pages after the first one may be fetched concurrently """
+        items = self._paged('ClosedOrders', 'closed', _time_range(start, end))
+        return [OrderRecord.from_dict(txid, order) for txid, order in items]
+
+    def trades_history(self, start: Optional[float] = None, end: Optional[float] = None) -> List[TradeRecord]:
+        """ Own trades, pages after the first one may be fetched concurrently """
+        items = self._paged('TradesHistory', 'trades', _time_range(start, end))
+        return [TradeRecord.from_dict(txid, trade) for txid, trade in items]
+
+    def _private(self, method: str, data: Optional[Dict] = None, json_body: bool = False) -> Dict:
+        self.counter.acquire(API_CALL_COSTS.get(method, 1))
+        return self._result(self._query_private(method, dict(data or {}), json_body=json_body))
+
+    def _paged(self, method: str, key: str, data: Dict) -> List:
+        """ Items of all pages of an ``ofs`` paged method, the first page gives total count and page size
+        Items shift between pages when new ones arrive while paging, the ones seen twice are kept once.
+        """
+        first = self._private(method, dict(data, ofs=0))
+        items: Dict = dict(first[key])
+        count = int(first['count'])
+        page_size = len(items)
+        if page_size == 0 or page_size >= count:
+            return list(items.items())
+        offsets = range(page_size, count, page_size)
+        pages = self._map_concurrent(lambda ofs: self._private(method, dict(data, ofs=ofs))[key], offsets)
+        for page in pages:
+            for txid, item in page.items():
+                items.setdefault(txid, item)
+        return list(items.items())
+
+
+def _balanced_batches(items: Sequence[T], size: int) -> List[Sequence[T]]:
+    """ Fewest batches of at most ``size`` items, sizes of the batches differ by one at most """
+    count = -(-len(items) // size)
+    base, extra = divmod(len(items), count)
+    batches = []
+    start = 0
+    for index in range(count):
+        end = start + base + (1 if index < extra else 0)
+        batches.append(items[start:end])
+        start = end
+    return batches
+
+
+def _time_range(start: Optional[float], end: Optional[float]) -> Dict:
+    data: Dict = {}
+    if start is not None:
+        data['start'] = start
+    if end is not None:
+        data['end'] = end
+    return data
@@ -0,0 +1,181 @@
+
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from kraken_web_api.model.pair_info import PairInfo
+
+if TYPE_CHECKING:
+    from kraken_web_api.client_base import ApiClientBase
+
+# Kraken uses its own asset codes, other venues the ISO-like ones
+ASSET_ALIASES = {"XBT": "BTC", "XDG": "DOGE"}
+
+CACHE_MAX_AGE = 24 * 60 * 60
+
+
+def default_cache_path() -> str:
+    """ Location of persisted AssetPairs metadata """
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "kraken-web-api", "asset_pairs.json")
+
+
+class PairRegistry:
+    """ Interned trading pairs
+    Every known alias of a pair (``XXBTZUSD``, ``XBTUSD``, ``XBT/USD``, ``BTC/USD``, ...) maps to the same small
+    integer id, so hot paths can key dicts and arrays by id. Names unknown to AssetPairs metadata get
+    their own ids on first use.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._pairs: List[Optional[PairInfo]] = []
+        self._asset_pairs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get_id(name) is not None
+
+    def intern(self, name: str) -> int:
+        """ Id of a pair, unknown pairs are registered under a new id """
+        pair_id = self._ids.get(name)
+        if pair_id is not None:
+            return pair_id
+        pair_id = self.get_id(name)
+        if pair_id is not None:
+            self._ids[name] = pair_id
+            return pair_id
+        with self._lock:
+            pair_id = self._ids.get(_normalize(name))
+            if pair_id is None:
+                pair_id = self._add(_normalize(name), None)
+            self._ids[name] = pair_id
+        return pair_id
+
+    def get_id(self, name: str) -> Optional[int]:
+        """ Id of a pair or None if it has not been interned yet """
+        pair_id = self._ids.get(name)
+        if pair_id is None:
+            pair_id = self._ids.get(_normalize(name))
+        return pair_id
+
+    def name(self, pair_id: int) -> str:
+        """ Canonical (websocket) name of a pair """
+        return self._names[pair_id]
+
+    def info(self, pair_id: int) -> Optional[PairInfo]:
+        """ AssetPairs metadata of a pair, None for pairs missing in metadata """
+        return self._pairs[pair_id]
+
+    def get(self, name: str) -> Optional[PairInfo]:
+        """ AssetPairs metadata of a pair by any of its names """
+        pair_id = self.get_id(name)
+        return None if pair_id is None else self._pairs[pair_id]
+
+    def normalize(self, name: str) -> str:
+        """ Canonical (websocket) name of a pair given by any of its names """
+        return self._names[self.intern(name)]
+
+    def load(self, asset_pairs: Dict[str, Dict]) -> None:
+        """ Register pairs from AssetPairs result
+        Aliases of a pair interned earlier under separate ids are merged onto the lowest of them, every name is
+        repointed to it and the merged ids resolve to the same name and metadata.
+        """
+        with self._lock:
+            for key, data in asset_pairs.items():
+                if 'altname' not in data or 'pair_decimals' not in data:
+                    continue
+                aliases = _aliases(key, data)
+                known = sorted({self._ids[a] for a in aliases if a in self._ids})
+                pair_id = known[0] if len(known) > 0 else self._add(aliases[0], None)
+                merged = set(known[1:])
+                if len(merged) > 0:
+                    for name, name_id in self._ids.items():
+                        if name_id in merged:
+                            self._ids[name] = pair_id
+                info = PairInfo.from_dict(pair_id, key, data)
+                for info_id in [pair_id, *merged]:
+                    self._pairs[info_id] = info
+                    self._names[info_id] = info.name
+                for alias in aliases:
+                    self._ids.setdefault(alias, pair_id)
+                self._asset_pairs[key] = data
+
+    def load_file(self, path: str) -> None:
+        """ Register pairs from a file written by ``save_file`` or holding raw AssetPairs result """
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        self.load(data.get('pairs', data))
+
+    def save_file(self, path: str) -> None:
+        """ Persist loaded AssetPairs metadata """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({'fetched': time.time(), 'pairs': self._asset_pairs}, file)
+        os.replace(path + ".tmp", path)
+
+    def load_rest(self, client: "ApiClientBase") -> None:
+        """ Register pairs fetched from Kraken AssetPairs REST method """
+        self.load(client._result(client._query_public('AssetPairs')))
+
+    def load_cached(self, client: Optional["ApiClientBase"] = None, path: Optional[str] = None,
+                    max_age: float = CACHE_MAX_AGE) -> None:
+        """ Register pairs from local cache, refreshing it over REST when it is missing or stale """
+        path = path or default_cache_path()
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age:
+            self.load_file(path)
+            return
+        if client is None:
+            from kraken_web_api.market_data import MarketDataClient
+            client = MarketDataClient()
+        self.load_rest(client)
+        self.save_file(path)
+
+    def _add(self, name: str, info: Optional[PairInfo]) -> int:
+        pair_id = len(self._names)
+        self._names.append(name)
+        self._pairs.append(info)
+        self._ids[name] = pair_id
+        return pair_id
+
+
+def _normalize(name: str) -> str:
+    """ Name lookup key, case insensitive and with Kraken asset codes """
+    name = name.upper()
+    if "/" in name:
+        base, quote = name.split("/", 1)
+        return _asset(base) + "/" + _asset(quote)
+    return name
+
+
+def _asset(code: str) -> str:
+    for kraken_code, alias in ASSET_ALIASES.items():
+        if code == alias:
+            return kraken_code
+    return code
+
+
+def _aliases(key: str, data: Dict) -> List[str]:
+    """ Lookup keys of a pair, the websocket name comes first """
+    aliases = []
+    wsname = data.get('wsname')
+    if wsname:
+        aliases.append(_normalize(wsname))
+    aliases.append(key.upper())
+    aliases.append(data['altname'].upper())
+    if wsname:
+        base, quote = wsname.upper().split("/", 1)
+        for b in {base, ASSET_ALIASES.get(base, base)}:
+            for q in {quote, ASSET_ALIASES.get(quote, quote)}:
+                aliases.append(b + q)
+    return list(dict.fromkeys(aliases))
+
+
+# process wide registry shared by all clients
+pair_registry = PairRegistry()
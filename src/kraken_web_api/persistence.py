@@ -0,0 +1,305 @@
+
+import asyncio
+import json
+import logging
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from decimal import Decimal
+from typing import IO, TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from kraken_web_api.exceptions import InvalidJsonException
+from kraken_web_api.helpers.helpers import from_dataclass_to_dict
+from kraken_web_api.model.channel import Channel
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+
+if TYPE_CHECKING:
+    from kraken_web_api.websocket import WebSocket
+
+SNAPSHOT_MAGIC = b"KWS2"
+SNAPSHOT_FILE = "state.snapshot"
+# journal files are suffixed with the generation of the snapshot they follow
+JOURNAL_FILE = "state.journal"
+
+# snapshot layout: header, channels JSON, then books with levels packed as (mantissa, exponent) decimal pairs
+_HEADER = struct.Struct("<IdII")
+_BOOK = struct.Struct("<qdII")
+_LEVEL = struct.Struct("<qbqbqb")
+_TEXT = struct.Struct("<h")
+
+# levels copied on the event loop: price, volume, timestamp
+_Level = Tuple[Decimal, Decimal, Decimal]
+# books copied on the event loop: channelID, count, symbol, checksum, updated, asks, bids
+_BookCopy = Tuple[Optional[int], Optional[str], Optional[str], Optional[str], Optional[float], List[_Level], List[_Level]]
+
+
+class StateStore:
+    """ Persist websocket channels and order books for warm restarts
+    State is written as a zlib compressed binary snapshot every ``snapshot_interval`` seconds, book updates and
+    replacements received in between are appended to a journal. Every snapshot starts a new journal generation
+    and removes the journals it covers once it is on disk. On restore books are rebuilt from the snapshot plus
+    the journals following it and flagged ``provisional`` until live snapshots replace them, the rebuilt state is
+    then written as a new snapshot so the journal starts empty.
+    """
+
+    def __init__(self, directory: str, snapshot_interval: float = 60.0, flush_interval: float = 1.0) -> None:
+        """
+        Parameters:
+            directory (str) : directory to keep snapshot and journal in
+            snapshot_interval (float) : seconds between snapshots
+            flush_interval (float) : seconds between journal flushes
+        """
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.flush_interval = flush_interval
+        self.channels: List[Channel] = []
+        self.logger = logging.getLogger("KrakenStateStore")
+        self.generation = 0
+        self._journal: Optional[IO[str]] = None
+        self._restoring = False
+        self._write_lock = threading.Lock()
+        self._written_generation = 0
+
+    @property
+    def restoring(self) -> bool:
+        """ Books are being rebuilt from snapshot and journal """
+        return self._restoring
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    @property
+    def journal_path(self) -> str:
+        """ Journal of the current generation """
+        return self._journal_path(self.generation)
+
+    def restore(self, websocket: "WebSocket") -> int:
+        """ Load provisional books into websocket, channels of the snapshot are kept in ``channels``
+        :returns: number of restored books
+        """
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, "rb") as file:
+            data = file.read()
+        if not data.startswith(SNAPSHOT_MAGIC):
+            raise InvalidJsonException("Unknown state snapshot format: %s", self.snapshot_path)
+        generation, channels, books = _decode_state(zlib.decompress(data[len(SNAPSHOT_MAGIC):]))
+        self.generation = self._written_generation = generation
+        self.channels = [Channel.from_dict(c) for c in channels]
+        self._restoring = True
+        try:
+            for book in books:
+                book.provisional = True
+                websocket._handle_order_book(book)
+            replayed = 0
+            for journal in self._journal_generations():
+                if journal >= generation:
+                    replayed += self._replay_journal(websocket, self._journal_path(journal))
+        finally:
+            self._restoring = False
+        self.logger.debug("Restored %d books and replayed %d journal updates", len(books), replayed)
+        self.write_snapshot(websocket)
+        return len(books)
+
+    def write_snapshot(self, websocket: "WebSocket") -> None:
+        """ Write snapshot of websocket state and start a new journal """
+        self._write_state(*self._copy_state(websocket))
+
+    async def save_snapshot(self, websocket: "WebSocket") -> None:
+        """ Write snapshot of websocket state and start a new journal
+        State is copied on the event loop, encoding and writing run in the default executor.
+        """
+        state = self._copy_state(websocket)
+        await asyncio.get_running_loop().run_in_executor(None, self._write_state, *state)
+
+    def journal_update(self, update: OrderBook) -> None:
+        """ Append book update or replacement (update with ``channelID``) to the journal """
+        if self._restoring:
+            return
+        if self._journal is None:
+            self._open_journal("a")
+        assert self._journal is not None
+        self._journal.write(json.dumps(_encode_book(update), separators=(",", ":")))
+        self._journal.write("\n")
+
+    def flush(self) -> None:
+        if self._journal is not None:
+            self._journal.flush()
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    async def run(self, websocket: "WebSocket") -> None:
+        """ Flush the journal and write snapshots periodically until cancelled """
+        last_snapshot = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if time.monotonic() - last_snapshot >= self.snapshot_interval:
+                await self.save_snapshot(websocket)
+                last_snapshot = time.monotonic()
+            else:
+                self.flush()
+
+    def _copy_state(self, websocket: "WebSocket") -> Tuple[int, List[Dict], List[_BookCopy]]:
+        """ Copy state to write and switch to the journal of a new generation, levels are updated in place """
+        channels = [from_dataclass_to_dict(c) for c in websocket.channels]
+        books = [_copy_book(b) for b in websocket.order_books]
+        self.generation = max([self.generation, *self._journal_generations()]) + 1
+        self._open_journal("w")
+        return self.generation, channels, books
+
+    def _write_state(self, generation: int, channels: List[Dict], books: List[_BookCopy]) -> None:
+        data = SNAPSHOT_MAGIC + zlib.compress(_encode_state(generation, channels, books))
+        temporary = f"{self.snapshot_path}.{generation}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        with self._write_lock:
+            # a newer snapshot written first already covers this one
+            if generation < self._written_generation:
+                os.remove(temporary)
+                return
+            os.replace(temporary, self.snapshot_path)
+            self._written_generation = generation
+            for journal in self._journal_generations():
+                if journal < generation:
+                    os.remove(self._journal_path(journal))
+
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{JOURNAL_FILE}.{generation}")
+
+    def _journal_generations(self) -> List[int]:
+        """ Generations of journals on disk in ascending order """
+        if not os.path.isdir(self.directory):
+            return []
+        prefix = JOURNAL_FILE + "."
+        return sorted(int(name[len(prefix):]) for name in os.listdir(self.directory)
+                      if name.startswith(prefix) and name[len(prefix):].isdigit())
+
+    def _replay_journal(self, websocket: "WebSocket", path: str) -> int:
+        replayed = 0
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    update = _decode_book(json.loads(line))
+                except ValueError:
+                    # the last line may be cut by a crash
+                    break
+                if update.channelID is not None:
+                    update.provisional = True
+                websocket._handle_order_book(update)
+                replayed += 1
+        return replayed
+
+    def _open_journal(self, mode: str) -> None:
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._journal = open(self.journal_path, mode, encoding="utf-8")
+
+
+def _copy_book(book: OrderBook) -> _BookCopy:
+    return (book.channelID, book.count, book.symbol, book.checksum, book.updated,
+            [(p.price, p.volume, p.timestamp) for p in book.asks],
+            [(p.price, p.volume, p.timestamp) for p in book.bids])
+
+
+def _encode_state(generation: int, channels: List[Dict], books: List[_BookCopy]) -> bytes:
+    encoded_channels = json.dumps(channels, separators=(",", ":")).encode()
+    parts = [_HEADER.pack(generation, time.time(), len(encoded_channels), len(books)), encoded_channels]
+    for channel_id, count, symbol, checksum, updated, asks, bids in books:
+        parts.append(_BOOK.pack(-1 if channel_id is None else channel_id,
+                                float("nan") if updated is None else updated, len(asks), len(bids)))
+        for text in (count, symbol, checksum):
+            _encode_text(parts, text)
+        for level in asks + bids:
+            parts.append(_LEVEL.pack(*_split_decimal(level[0]), *_split_decimal(level[1]), *_split_decimal(level[2])))
+    return b"".join(parts)
+
+
+def _decode_state(data: bytes) -> Tuple[int, List[Dict], List[OrderBook]]:
+    generation, _, channels_size, book_count = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    channels = json.loads(data[offset:offset + channels_size])
+    offset += channels_size
+    books = []
+    for _ in range(book_count):
+        channel_id, updated, ask_count, bid_count = _BOOK.unpack_from(data, offset)
+        offset += _BOOK.size
+        texts = []
+        for _ in range(3):
+            text, offset = _decode_text(data, offset)
+            texts.append(text)
+        levels = []
+        for fields in _LEVEL.iter_unpack(data[offset:offset + (ask_count + bid_count) * _LEVEL.size]):
+            levels.append(Price(Decimal(fields[0]).scaleb(fields[1]), Decimal(fields[2]).scaleb(fields[3]),
+                                Decimal(fields[4]).scaleb(fields[5])))
+        offset += (ask_count + bid_count) * _LEVEL.size
+        books.append(OrderBook(None if channel_id == -1 else channel_id, texts[0], texts[1],
+                               levels[:ask_count], levels[ask_count:], checksum=texts[2],
+                               updated=None if math.isnan(updated) else updated))
+    return generation, channels, books
+
+
+def _split_decimal(value: Decimal) -> Tuple[int, int]:
+    """ Integer mantissa and exponent keeping trailing zeros, the checksum is computed from the digits """
+    text = str(value)
+    if "E" in text:
+        exponent = value.as_tuple().exponent
+        assert isinstance(exponent, int)
+        return int(value.scaleb(-exponent)), exponent
+    # splitting the plain string is several times faster than as_tuple
+    whole, _, fraction = text.partition(".")
+    return int(whole + fraction), -len(fraction)
+
+
+def _encode_text(parts: List[bytes], text: Optional[str]) -> None:
+    if text is None:
+        parts.append(_TEXT.pack(-1))
+    else:
+        encoded = text.encode()
+        parts.append(_TEXT.pack(len(encoded)))
+        parts.append(encoded)
+
+
+def _decode_text(data: bytes, offset: int) -> Tuple[Optional[str], int]:
+    size, = _TEXT.unpack_from(data, offset)
+    offset += _TEXT.size
+    if size == -1:
+        return None, offset
+    return data[offset:offset + size].decode(), offset + size
+
+
+def _encode_book(book: OrderBook) -> Dict:
+    return {
+        "channelID": book.channelID,
+        "count": book.count,
+        "symbol": book.symbol,
+        "asks": [_encode_price(p) for p in book.asks],
+        "bids": [_encode_price(p) for p in book.bids],
+        "checksum": book.checksum,
+        "updated": book.updated,
+    }
+
+
+def _decode_book(data: Dict) -> OrderBook:
+    return OrderBook(
+        data["channelID"], data["count"], data["symbol"],
+        [_decode_price(p) for p in data["asks"]],
+        [_decode_price(p) for p in data["bids"]],
+        checksum=data["checksum"],
+        updated=data["updated"],
+    )
+
+
+def _encode_price(price: Price) -> List[str]:
+    return [format(price.price, "f"), format(price.volume, "f"), format(price.timestamp, "f")]
+
+
+def _decode_price(data: List[str]) -> Price:
+    return Price(Decimal(data[0]), Decimal(data[1]), Decimal(data[2]))
@@ -0,0 +1,148 @@
+
+from collections import deque
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Deque, Dict, List, Optional, Tuple
+
+from kraken_web_api.enums import SequenceStatus
+from kraken_web_api.helpers.checksum import book_checksum
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+
+# order books are keyed by (pair id, channel name) like in WebSocket
+BookKey = Tuple[int, Optional[str]]
+
+
+@dataclass
+class BookSequence:
+    """ Sequencing state of a single order book """
+    status: SequenceStatus = SequenceStatus.live
+    buffer: Deque[OrderBook] = field(default_factory=deque)
+    stale: int = 0
+    gaps: int = 0
+    # a resync has been requested and the book is known to be wrong until its snapshot arrives
+    resync_pending: bool = False
+
+
+class BookSequencer:
+    """ Order book updates sequencing
+    Kraken book messages carry no sequence number, the per-level timestamps and the update checksum are used instead:
+    levels older than the level of the same price already in the book are dropped as out of order, and a checksum
+    mismatch after an update marks the book as having a gap. While a book bootstraps from a REST snapshot updates are
+    buffered, once the snapshot arrives the ones newer than it are spliced in.
+    """
+
+    def __init__(self, verify_checksum: bool = True, max_buffer: int = 10000) -> None:
+        """
+        Parameters:
+            verify_checksum (bool) : compare book checksum with the one of every update
+            max_buffer (int) : maximum number of updates buffered while bootstrapping, the oldest ones are dropped
+        """
+        self.verify_checksum = verify_checksum
+        self.max_buffer = max_buffer
+        self._states: Dict[BookKey, BookSequence] = {}
+
+    def state(self, key: BookKey) -> BookSequence:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = BookSequence(buffer=deque(maxlen=self.max_buffer))
+        return state
+
+    def snapshot(self, key: BookKey) -> None:
+        """ Websocket snapshot replaced the book, it supersedes any bootstrap in progress """
+        state = self.state(key)
+        state.status = SequenceStatus.live
+        state.resync_pending = False
+        state.buffer.clear()
+
+    def begin_resync(self, key: BookKey) -> None:
+        """ Stop verifying checksums of the book until a snapshot replaces it """
+        self.state(key).resync_pending = True
+
+    def begin_bootstrap(self, key: BookKey) -> None:
+        """ Buffer updates of the book until ``splice`` or ``abort_bootstrap`` """
+        self.state(key).status = SequenceStatus.bootstrapping
+
+    def accept(self, key: BookKey, update: OrderBook, book: OrderBook) -> bool:
+        """ Drop out of order levels of the update
+        :returns: False when the update has been buffered instead of being applied
+        """
+        state = self.state(key)
+        if state.status is SequenceStatus.bootstrapping:
+            state.buffer.append(update)
+            return False
+        self._drop_stale(state, update, book, None)
+        return True
+
+    def verify(self, key: BookKey, book: OrderBook, checksum: Optional[str]) -> bool:
+        """ Compare checksum of the updated book with the one sent along the update, a mismatch marks a gap
+        :returns: False on checksum mismatch
+        """
+        if not self.verify_checksum or checksum is None:
+            return True
+        state = self.state(key)
+        if state.resync_pending or book_checksum(book.asks, book.bids) == int(checksum):
+            return True
+        state.gaps += 1
+        state.status = SequenceStatus.gap
+        return False
+
+    def splice(self, key: BookKey, snapshot: OrderBook) -> Optional[List[OrderBook]]:
+        """ Finish bootstrap with REST snapshot of the book
+        Buffered levels older than the snapshot level of the same price are dropped, and so are inserts of prices
+        missing in the snapshot range older than its newest level.
+        :returns: buffered updates to apply on top of the snapshot, None when a websocket snapshot came first
+        """
+        state = self.state(key)
+        if state.status is not SequenceStatus.bootstrapping:
+            return None
+        levels = snapshot.asks + snapshot.bids
+        cutoff = max(p.timestamp for p in levels) if len(levels) > 0 else None
+        updates = list(state.buffer)
+        for update in updates:
+            self._drop_stale(state, update, snapshot, cutoff)
+        state.buffer.clear()
+        state.status = SequenceStatus.live
+        state.resync_pending = False
+        return updates
+
+    def abort_bootstrap(self, key: BookKey) -> List[OrderBook]:
+        """ Give up bootstrapping, the book is left with a gap
+        :returns: buffered updates
+        """
+        state = self.state(key)
+        updates = list(state.buffer)
+        state.buffer.clear()
+        # the next checksum mismatch requests another resync
+        state.resync_pending = False
+        if state.status is SequenceStatus.bootstrapping:
+            state.status = SequenceStatus.gap
+        return updates
+
+    def _drop_stale(self, state: BookSequence, update: OrderBook, book: OrderBook, cutoff: Optional[Decimal]) -> None:
+        if len(update.asks) > 0:
+            update.asks = self._fresh(state, update.asks, book, True, cutoff)
+        if len(update.bids) > 0:
+            update.bids = self._fresh(state, update.bids, book, False, cutoff)
+
+    @staticmethod
+    def _fresh(state: BookSequence, prices: List[Price], book: OrderBook,
+               is_ask: bool, cutoff: Optional[Decimal]) -> List[Price]:
+        """ Levels of the update not older than the book, the update list is returned when nothing is dropped """
+        fresh = prices
+        side = book.asks if is_ask else book.bids
+        for index, price in enumerate(prices):
+            level = book.level(price.price, is_ask)
+            if level is not None:
+                stale = price.timestamp < level.timestamp
+            else:
+                # a missing price within the snapshot range was not in the book when the snapshot was taken
+                stale = (cutoff is not None and price.volume > 0 and price.timestamp < cutoff
+                         and len(side) > 0 and (price.price < side[-1].price if is_ask else price.price > side[-1].price))
+            if stale:
+                state.stale += 1
+                if fresh is prices:
+                    fresh = prices[:index]
+            elif fresh is not prices:
+                fresh.append(price)
+        return fresh
@@ -0,0 +1,306 @@
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+from kraken_web_api.enums import SubscriptionType
+from kraken_web_api.helpers.checksum import book_checksum
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+
+PRICE_DECIMALS = 5
+VOLUME_DECIMALS = 8
+TICK = Decimal(1).scaleb(-1)
+# levels kept below the published depth, they are republished when a visible level is deleted
+RESERVE_LEVELS = 10
+# maximum messages sent per stream before yielding to the event loop
+MAX_BATCH = 1000
+
+
+class SimulatedBook:
+    """ Randomly changing order book producing Kraken book messages """
+
+    def __init__(self, channel_id: int, pair: str, depth: int, mid: Decimal, rng: random.Random) -> None:
+        self.channel_id = channel_id
+        self.pair = pair
+        self.depth = depth
+        self.channel_name = f"book-{depth}"
+        self.rng = rng
+        levels = depth + RESERVE_LEVELS
+        self.book = OrderBook(
+            channel_id, self.channel_name, pair,
+            [self._level(mid + TICK * (i + 1)) for i in range(levels)],
+            [self._level(mid - TICK * i) for i in range(levels)],
+        )
+
+    def snapshot(self) -> List:
+        return [self.channel_id,
+                {"as": [_encode(p) for p in self.book.asks[:self.depth]],
+                 "bs": [_encode(p) for p in self.book.bids[:self.depth]]},
+                self.channel_name, self.pair]
+
+    def update(self) -> List:
+        """ Apply random change to one or both sides and return the update message
+        Changes of both sides are sent like Kraken does, as an asks dict followed by a bids dict with the checksum.
+        """
+        both = self.rng.random() < 0.2
+        is_ask = self.rng.random() < 0.5
+        sides = [True, False] if both else [is_ask]
+        message: List = [self.channel_id]
+        for side in sides:
+            key = "a" if side else "b"
+            message.append({key: self._change(side)})
+        message[-1]["c"] = str(book_checksum(self.book.asks[:self.depth], self.book.bids[:self.depth]))
+        return message + [self.channel_name, self.pair]
+
+    def _change(self, is_ask: bool) -> List:
+        """ Apply random change to one side, returns encoded levels to publish with republished ones flagged """
+        levels = self.book.asks if is_ask else self.book.bids
+        visible = min(self.depth, len(levels))
+        action = self.rng.random()
+        records = []
+        if action < 0.6:
+            level = levels[self.rng.randrange(visible)]
+            records.append(self._level(level.price))
+        elif action < 0.8 and len(levels) > self.depth:
+            level = levels[self.rng.randrange(visible)]
+            records.append(Price(level.price, Decimal(0).quantize(Decimal(1).scaleb(-VOLUME_DECIMALS)), _now()))
+            # the level entering the visible depth is republished
+            entering = levels[self.depth]
+            records.append(Price(entering.price, entering.volume, _now()))
+        else:
+            records.append(self._level(self._free_price(levels, is_ask)))
+        if is_ask:
+            self.book.update_asks([Price(r.price, r.volume, r.timestamp) for r in records])
+        else:
+            self.book.update_bids([Price(r.price, r.volume, r.timestamp) for r in records])
+        self._refill(levels, is_ask)
+        encoded = [_encode(r) for r in records]
+        if len(records) > 1:
+            encoded[1].append("r")
+        return encoded
+
+    def ticker(self) -> List:
+        ask, bid = self.book.asks[0], self.book.bids[0]
+        mid = format((ask.price + bid.price) / 2, f".{PRICE_DECIMALS}f")
+        volume = format(ask.volume + bid.volume, f".{VOLUME_DECIMALS}f")
+        return [self.channel_id,
+                {"a": [_price(ask.price), int(ask.volume), _volume(ask.volume)],
+                 "b": [_price(bid.price), int(bid.volume), _volume(bid.volume)],
+                 "c": [mid, _volume(bid.volume)], "v": [volume, volume], "p": [mid, mid],
+                 "t": [self.rng.randrange(1000), self.rng.randrange(10000)],
+                 "l": [_price(bid.price), _price(bid.price)], "h": [_price(ask.price), _price(ask.price)],
+                 "o": [mid, mid]},
+                SubscriptionType.ticker.name, self.pair]
+
+    def _level(self, price: Decimal) -> Price:
+        volume = Decimal(self.rng.randint(1, 10 ** 10)).scaleb(-VOLUME_DECIMALS)
+        return Price(price.quantize(Decimal(1).scaleb(-PRICE_DECIMALS)), volume, _now())
+
+    def _free_price(self, levels: List[Price], is_ask: bool) -> Decimal:
+        """ Price inside the visible depth which is not present in the book """
+        existing = {p.price for p in levels}
+        worst = levels[min(self.depth, len(levels)) - 1].price
+        best = self.book.bids[0].price + TICK if is_ask else self.book.asks[0].price - TICK
+        steps = int(abs(worst - best) / TICK) + 1
+        for _ in range(steps):
+            price = best + TICK * self.rng.randrange(steps) * (1 if is_ask else -1)
+            if price not in existing:
+                return price
+        return levels[-1].price + (TICK if is_ask else -TICK)
+
+    def _refill(self, levels: List[Price], is_ask: bool) -> None:
+        """ Keep enough hidden levels below the visible depth """
+        while len(levels) < self.depth + RESERVE_LEVELS:
+            level = self._level(levels[-1].price + (TICK if is_ask else -TICK))
+            levels.append(level)
+
+
+class KrakenSimulator:
+    """ Local websocket server speaking Kraken public websocket protocol
+    Book subscriptions get a snapshot followed by random updates with valid CRC32 checksums, ticker
+    subscriptions get tickers, both at configurable rates per subscribed pair.
+
+        async with KrakenSimulator(book_rate=1000) as simulator:
+            async with WebSocket(socket_uri=simulator.uri) as client:
+                ...
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 book_rate: float = 10.0, ticker_rate: float = 1.0,
+                 seed: Optional[int] = None) -> None:
+        """
+        Parameters:
+            host (str) : interface to listen on
+            port (int) : port to listen on, 0 to pick a free one
+            book_rate (float) : book updates per second per subscribed pair
+            ticker_rate (float) : tickers per second per subscribed pair
+            seed (int) : random seed for reproducible streams
+        """
+        self.host = host
+        self.port = port
+        self.book_rate = book_rate
+        self.ticker_rate = ticker_rate
+        self.rng = random.Random(seed)
+        self.logger = logging.getLogger("KrakenSimulator")
+        self.sent = 0
+        self._server = None
+        self._channel_ids = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def uri(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_t, exc_v, exc_tb):
+        await self.stop()
+
+    async def start(self) -> None:
+        self._server = await websockets.serve(self._serve, self.host, self.port)  # type: ignore
+        self.port = self._server.sockets[0].getsockname()[1]  # type: ignore
+        self.logger.debug("Simulator is listening on %s", self.uri)
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, websocket, path: str = "/") -> None:
+        # channel id and streaming task keyed by channel name and pair
+        streams: Dict[str, Tuple[int, asyncio.Task]] = {}
+        await websocket.send(json.dumps({"connectionID": uuid.uuid4().int >> 64, "event": "systemStatus",
+                                         "status": "online", "version": "1.9.0"}))
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                event = request.get("event")
+                if event == "ping":
+                    await websocket.send(json.dumps({"event": "pong", "reqid": request.get("reqid")}))
+                elif event == "subscribe":
+                    for pair in request.get("pair", []):
+                        await self._subscribe(websocket, streams, pair, request["subscription"])
+                elif event == "unsubscribe":
+                    for pair in request.get("pair", []):
+                        await self._unsubscribe(websocket, streams, pair, request["subscription"])
+        except ConnectionClosed:
+            pass
+        finally:
+            for _, task in streams.values():
+                task.cancel()
+
+    async def _subscribe(self, websocket, streams: Dict[str, Tuple[int, asyncio.Task]], pair: str, subscription: Dict) -> None:
+        name = subscription["name"]
+        depth = int(subscription.get("depth", 10))
+        channel_name = f"book-{depth}" if name == SubscriptionType.book.name else name
+        key = f"{channel_name}:{pair}"
+        if key in streams:
+            return
+        self._channel_ids += 1
+        book = SimulatedBook(self._channel_ids, pair, depth, Decimal(100 + 10 * len(streams)), self.rng)
+        await websocket.send(json.dumps(self._status(book, pair, subscription, "subscribed")))
+        if name == SubscriptionType.book.name:
+            streams[key] = (book.channel_id, self._start(self._stream_book(websocket, book)))
+        elif name == SubscriptionType.ticker.name:
+            streams[key] = (book.channel_id, self._start(self._stream(websocket, book.ticker, self.ticker_rate)))
+
+    async def _unsubscribe(self, websocket, streams: Dict[str, Tuple[int, asyncio.Task]], pair: str, subscription: Dict) -> None:
+        name = subscription["name"]
+        prefix = "book-" if name == SubscriptionType.book.name else name
+        for key in [k for k in streams if k.startswith(prefix) and k.endswith(":" + pair)]:
+            channel_id, task = streams.pop(key)
+            task.cancel()
+            channel_name = key.split(":", 1)[0]
+            await websocket.send(json.dumps({"channelName": channel_name, "event": "subscriptionStatus",
+                                             "pair": pair, "status": "unsubscribed", "subscription": subscription,
+                                             "channelID": channel_id}))
+
+    @staticmethod
+    def _status(book: SimulatedBook, pair: str, subscription: Dict, status: str) -> Dict:
+        is_book = subscription["name"] == SubscriptionType.book.name
+        return {"channelID": book.channel_id,
+                "channelName": book.channel_name if is_book else subscription["name"],
+                "event": "subscriptionStatus", "pair": pair, "status": status, "subscription": subscription}
+
+    def _start(self, coroutine) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _stream_book(self, websocket, book: SimulatedBook) -> None:
+        await websocket.send(json.dumps(book.snapshot()))
+        self.sent += 1
+        await self._stream(websocket, book.update, self.book_rate)
+
+    async def _stream(self, websocket, produce, rate: float) -> None:
+        """ Send produced messages at given rate, batching them when the event loop can't keep up with the rate """
+        if rate <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = 0
+        try:
+            while True:
+                due = min(int((loop.time() - started) * rate) - sent, MAX_BATCH)
+                for _ in range(due):
+                    await websocket.send(json.dumps(produce()))
+                sent += max(due, 0)
+                self.sent += max(due, 0)
+                await asyncio.sleep(max(1.0 / rate, 0.001) if due <= 0 else 0)
+        except ConnectionClosed:
+            pass
+
+
+def _now() -> Decimal:
+    return Decimal(f"{time.time():.6f}")
+
+
+def _price(value: Decimal) -> str:
+    return format(value, f".{PRICE_DECIMALS}f")
+
+
+def _volume(value: Decimal) -> str:
+    return format(value, f".{VOLUME_DECIMALS}f")
+
+
+def _encode(price: Price) -> List:
+    return [_price(price.price), _volume(price.volume), format(price.timestamp, "f")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Kraken websocket simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--book-rate", type=float, default=10.0, help="book updates per second per pair")
+    parser.add_argument("--ticker-rate", type=float, default=1.0, help="tickers per second per pair")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        async with KrakenSimulator(args.host, args.port, args.book_rate, args.ticker_rate, args.seed) as simulator:
+            print(f"Kraken simulator is listening on {simulator.uri}", flush=True)
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
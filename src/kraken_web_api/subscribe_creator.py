@@ -1,18 +1,39 @@
 
 from abc import ABC, abstractmethod
-from typing import Dict
+import json
+from typing import Dict, List, Tuple
 
 from kraken_web_api.enums import SubscriptionType
 from kraken_web_api.model.subscription import Subscription, SubscriptionRequest
 from kraken_web_api.helpers.helpers import from_dataclass_to_dict
 
 
+_PAIR_PLACEHOLDER = "\x00pair\x00"
+
+
 class RequestCreator(ABC):
+    def __init__(self) -> None:
+        self._templates: Dict[Tuple, List[str]] = {}
+
     @abstractmethod
     def create(self, type: SubscriptionType, **kwargs) -> Dict:
         """ Create subscription object """
         raise NotImplementedError()
 
+    def create_message(self, type: SubscriptionType, **kwargs) -> str:
+        """ Create JSON encoded subscription request
+        Requests differing only by pair share a pre-encoded template, so only the pair is encoded per call.
+        """
+        if 'pair' not in kwargs:
+            return json.dumps(self.create(type, **kwargs))
+        pair = kwargs.pop('pair')
+        key = (type, tuple(sorted(kwargs.items())))
+        template = self._templates.get(key)
+        if template is None:
+            encoded = json.dumps(self.create(type, pair=_PAIR_PLACEHOLDER, **kwargs))
+            template = self._templates[key] = encoded.split(json.dumps(_PAIR_PLACEHOLDER))
+        return json.dumps(pair).join(template)
+
 
 class SubscribtionRequestCreator(RequestCreator):
 
@@ -55,7 +76,7 @@ class SubscribtionRequestCreator(RequestCreator):
             event="subscribe" if kwargs['subscribe'] else "unsubscribe",
             subscription=Subscription(
                 name=SubscriptionType.book,
-                depth=kwargs['depth'] if kwargs['subscribe'] else None,
+                depth=kwargs['depth'] if kwargs['subscribe'] else kwargs.get('depth'),
             ),
             pair=[kwargs['pair']]
         )
@@ -1,11 +1,15 @@
 
 import asyncio
-import json
 import logging
-from typing import Callable, Dict, List, Set, Optional, Union
-from websockets import client
+import sys
+import time
+from concurrent.futures import Executor
+from decimal import Decimal
+from typing import TYPE_CHECKING, Callable, Dict, List, Set, Optional, Tuple, Union
 
-from kraken_web_api.constants import SOCKET_PUBLIC
+from kraken_web_api.book_view import BookView
+from kraken_web_api.callbacks import CallbackDispatcher
+from kraken_web_api.constants import BOOK_DEPTHS, BOOK_VOLUME_DECIMALS, SOCKET_PUBLIC
 from kraken_web_api.enums import ChannelStatus, ConnectionStatus, SubscriptionType
 from kraken_web_api.exceptions import SocketConnectionError
 from kraken_web_api.handlers import Handler
@@ -14,23 +18,70 @@ from kraken_web_api.model.connection import SocketConnection
 from kraken_web_api.model.order_book import OrderBook
 from kraken_web_api.model.price import Price
 from kraken_web_api.model.ticker import Ticker
+from kraken_web_api.pairs import PairRegistry, pair_registry
+from kraken_web_api.sequencing import BookKey, BookSequencer
 from kraken_web_api.subscribe_creator import SubscribtionRequestCreator, RequestCreator
 
+if TYPE_CHECKING:
+    from websockets.client import WebSocketClientProtocol
+    from kraken_web_api.market_data import MarketDataClient
+    from kraken_web_api.persistence import StateStore
+
+# maximum count of REST Depth
+REST_DEPTH_LIMIT = 500
+
 
 class WebSocket:
     def __init__(self, name: str = "KrakenWS",
-                 socket_log_level: int = logging.INFO) -> None:
+                 socket_log_level: int = logging.INFO,
+                 pairs: Optional[PairRegistry] = None,
+                 callback_max_pending: int = 100,
+                 callback_timeout: Optional[float] = None,
+                 callback_executor: Optional[Executor] = None,
+                 socket_uri: str = SOCKET_PUBLIC,
+                 connect_timeout: float = 10.0,
+                 state_store: Optional["StateStore"] = None,
+                 market_data: Optional["MarketDataClient"] = None,
+                 sequencer: Optional[BookSequencer] = None,
+                 resync_on_gap: bool = True) -> None:
         """ Initialise new kraken websocket client
         Parameters:
             name (str) : Name of the client (for logger)
             socket_log_level (int) : log level for socket inner client (not for kraken WS client)
+            pairs (PairRegistry) : registry interning pair names, process wide one by default
+            callback_max_pending (int) : maximum number of running coroutine (or executor) callbacks
+            callback_timeout (float) : seconds after which a running callback is abandoned
+            callback_executor (Executor) : executor to run sync callbacks in, they run inline by default
+            socket_uri (str) : public websocket uri, e.g. of a local simulator
+            connect_timeout (float) : seconds to wait for the connection status message
+            state_store (StateStore) : store to restore books from on enter and persist them to
+            market_data (MarketDataClient) : REST client to bootstrap books from, and to resync them after gaps
+            sequencer (BookSequencer) : sequencing of book updates, one verifying checksums by default
+            resync_on_gap (bool) : resync book after checksum mismatch, from REST when ``market_data`` is set,
+                                   by subscribing the book again otherwise
         """
         self._configure_loggers(name, socket_log_level)
+        self.callbacks = CallbackDispatcher(self.logger, callback_max_pending, callback_timeout, callback_executor)
+        self.pairs = pairs if pairs is not None else pair_registry
+        self.socket_uri = socket_uri
+        self.connect_timeout = connect_timeout
+        self.state_store = state_store
+        self._state_task: Optional[asyncio.Future] = None
+        self.market_data = market_data
+        self.sequencer = sequencer if sequencer is not None else BookSequencer()
+        self.resync_on_gap = resync_on_gap
+        self._resync_tasks: Dict[BookKey, asyncio.Future] = {}
         self.connections: Set[SocketConnection] = set()
         self.channels: Set[Channel] = set()
         self.order_books: List[OrderBook] = list()
         self.tickers: List[Ticker] = list()
-        self.disconnecting = False
+        # positions in order_books and tickers keyed by (pair id, channel name)
+        self._order_book_positions: Dict[Tuple[int, Optional[str]], int] = {}
+        self._ticker_positions: Dict[Tuple[int, str], int] = {}
+        # book views per pair id ordered by depth, and depth of the book subscription they share
+        self._book_views: Dict[int, List[BookView]] = {}
+        self._book_view_depths: Dict[int, int] = {}
+        self._disconnect_task: Optional[asyncio.Future] = None
         self.request_creator: RequestCreator = SubscribtionRequestCreator()  # type: ignore
         self._on_orderbook_changed: Optional[Callable] = None
         self._on_ticker_changed: Optional[Callable] = None
@@ -38,34 +89,146 @@ class WebSocket:
         self.logger.debug("Kraken websocket client has been instantiated")
 
     async def __aenter__(self):
-        await self._connect_socket(SOCKET_PUBLIC)
+        if self.state_store is not None:
+            self.state_store.restore(self)
+            self._state_task = asyncio.ensure_future(self.state_store.run(self))
+        await self._connect_socket(self.socket_uri)
         return self
 
     async def __aexit__(self, exc_t, exc_v, exc_tb):
+        if self.state_store is not None:
+            if self._state_task is not None:
+                self._state_task.cancel()
+            # before unsubscribing, unsubscribed replies remove the channels to restore
+            await self.state_store.save_snapshot(self)
         await self.unsubscribe_all()
         await self._disconnect_all()
+        for task in self._resync_tasks.values():
+            task.cancel()
+        await self.callbacks.aclose(self.callbacks.timeout)
+        if self.state_store is not None:
+            self.state_store.close()
+
+    async def resubscribe(self, channels: List[Channel]) -> None:
+        """ Subscribe channels again, e.g. the ones restored by state store """
+        for channel in channels:
+            if channel.subscription.name == SubscriptionType.book.name:
+                await self._subscribe_book(channel.pair, channel.subscription.depth or 10)
+            elif channel.subscription.name == SubscriptionType.ticker.name:
+                await self._send_public(self.request_creator.create_message(
+                    type=SubscriptionType.ticker, pair=channel.pair, subscribe=True))
 
-    async def subscribe_orders_book(self, pair: str, depth: int, on_update: Callable = None) -> None:
+    async def subscribe_orders_book(self, pair: str, depth: int, on_update: Optional[Callable] = None) -> None:
         """ Subscribe to orders book
         Parameters:
             pair (str) : Trading pair ("ETH/BTC", etc.)
             depth (int) : Book depth (10, 100, 500, etc.)
-            on_update (function) : Function to invoke on book updates
+            on_update (function) : Function or coroutine function to invoke on book updates
         """
-        if self._get_public_connection() is None:
-            await self._connect_socket(SOCKET_PUBLIC)
-        request = self.request_creator.create(type=SubscriptionType.book,
-                                              pair=pair, depth=depth, subscribe=True)
-        await self._send_public(json.dumps(request))
+        await self._subscribe_book(pair, depth)
         self._on_orderbook_changed = on_update
 
-    async def subscribe_ticker_info(self, pair: str, on_update: Callable = None) -> None:
-        """ Ticker information on currency pair. """
+    async def subscribe_book_view(self, pair: str, depth: int, on_update: Optional[Callable] = None) -> BookView:
+        """ Get read-only view on top levels of a pair book
+        All views of a pair share a single book subscription of the largest requested depth (rounded up to a
+        depth supported by Kraken). A deeper view replaces that subscription with a deeper one.
+        Parameters:
+            pair (str) : Trading pair ("ETH/BTC", etc.)
+            depth (int) : Number of levels of the view
+            on_update (function) : Function or coroutine function invoked with the view
+                                   when a change lands within its depth
+        """
+        pair_id = self._pair_id(pair)
+        view = BookView(pair, depth, on_update)
+        views = self._book_views.setdefault(pair_id, [])
+        views.append(view)
+        views.sort(key=lambda v: v.depth)
+        subscribed = self._book_view_depths.get(pair_id)
+        if subscribed is not None:
+            view.book = self._get_order_book(pair_id, subscribed)
+        if subscribed is None or (subscribed < depth and subscribed < BOOK_DEPTHS[-1]):
+            book_depth = next((d for d in BOOK_DEPTHS if d >= depth), BOOK_DEPTHS[-1])
+            self._book_view_depths[pair_id] = book_depth
+            await self._subscribe_book(pair, book_depth)
+            if subscribed is not None:
+                await self._send_public(self.request_creator.create_message(
+                    type=SubscriptionType.book, pair=pair, depth=subscribed, subscribe=False))
+        return view
+
+    def remove_book_view(self, view: BookView) -> None:
+        """ Stop notifying the view, the shared book subscription is kept """
+        views = self._book_views.get(self._pair_id(view.pair), [])
+        if view in views:
+            views.remove(view)
+
+    async def bootstrap_book(self, pair: str, depth: int, client: Optional["MarketDataClient"] = None) -> OrderBook:
+        """ Start the book from REST depth instead of waiting for the websocket snapshot
+        The book is subscribed unless it already is. Updates received while the REST request is in flight
+        are buffered and spliced into the REST snapshot, a websocket snapshot arriving first wins.
+        Parameters:
+            pair (str) : Trading pair ("ETH/BTC", etc.)
+            depth (int) : Book depth (10, 100, 500, etc.)
+            client (MarketDataClient) : REST client, ``market_data`` of the websocket by default
+        """
+        client = client if client is not None else self.market_data
+        if client is None:
+            raise ValueError("MarketDataClient is required to bootstrap order books")
+        pair_id = self._pair_id(pair)
+        count = f"book-{depth}"
+        key = (pair_id, count)
+        current = self._get_order_book(pair_id, depth)
+        self.sequencer.begin_bootstrap(key)
+        if current is None and not any(c.pair == pair and c.channelName == count for c in self.channels):
+            await self._subscribe_book(pair, depth)
+        info = self.pairs.get(pair)
+        rest_pair = info.altname if info is not None else pair.replace("/", "")
+        loop = asyncio.get_running_loop()
+        try:
+            # twice the depth, so that levels republished into the book are found in the snapshot
+            data = await loop.run_in_executor(None, client.depth, rest_pair, min(2 * depth, REST_DEPTH_LIMIT))
+        except Exception:
+            for update in self.sequencer.abort_bootstrap(key):
+                self._handle_order_book(update)
+            raise
+        # REST trims trailing zeros, levels get websocket digits so that checksums of the spliced book match
+        price_decimals = info.pair_decimals if info is not None else _price_decimals(current)
+        snapshot = OrderBook(current.channelID if current is not None else 0, count, pair,
+                             [_rest_price(p, price_decimals) for p in data['asks']],
+                             [_rest_price(p, price_decimals) for p in data['bids']],
+                             updated=time.time())
+        updates = self.sequencer.splice(key, snapshot)
+        if updates is None:
+            book = self._get_order_book(pair_id, depth)
+            assert book is not None
+            return book
+        snapshot.truncate(depth)
+        self._install_book(pair_id, key, snapshot)
+        if self._on_orderbook_changed is not None:
+            self.callbacks.dispatch(self._on_orderbook_changed)
+        for index, update in enumerate(updates):
+            # checksums of buffered updates match only once all of them are applied
+            if index < len(updates) - 1:
+                update.checksum = None
+            self._handle_order_book(update)
+        self.logger.debug("Order book %s has been bootstrapped, %d buffered updates spliced", key, len(updates))
+        return snapshot
+
+    async def _subscribe_book(self, pair: str, depth: int) -> None:
         if self._get_public_connection() is None:
-            await self._connect_socket(SOCKET_PUBLIC)
-        request = self.request_creator.create(type=SubscriptionType.ticker,
-                                              pair=pair, subscribe=True)
-        await self._send_public(json.dumps(request))
+            await self._connect_socket(self.socket_uri)
+        message = self.request_creator.create_message(type=SubscriptionType.book,
+                                                      pair=pair, depth=depth, subscribe=True)
+        await self._send_public(message)
+
+    async def subscribe_ticker_info(self, pair: str, on_update: Optional[Callable] = None) -> None:
+        """ Ticker information on currency pair.
+        on_update may be a function or a coroutine function
+        """
+        if self._get_public_connection() is None:
+            await self._connect_socket(self.socket_uri)
+        message = self.request_creator.create_message(type=SubscriptionType.ticker,
+                                                      pair=pair, subscribe=True)
+        await self._send_public(message)
         self._on_ticker_changed = on_update
 
     async def unsubscribe_all(self) -> None:
@@ -76,36 +239,40 @@ class WebSocket:
 
     async def _unsubscribe_public(self, channel: Channel) -> None:
         """ Unsubscribe channel using public connection """
-        request = None
+        message = None
         connection = self._get_public_connection()
         if connection is not None:
             if channel.subscription.name == SubscriptionType.book.name:
-                request = self._create_unsubscribe_book_request(channel)
+                message = self._create_unsubscribe_book_request(channel)
             if channel.subscription.name == SubscriptionType.ticker.name:
-                pass
-            if request is not None:
-                await connection.websocket.send(json.dumps(request))
-
-    def _create_unsubscribe_book_request(self, channel: Channel) -> Optional[Dict]:
-        books = [b for b in self.order_books if b.channelID == channel.channelID]
-        if len(books) > 0:
-            return self.request_creator.create(type=SubscriptionType.book,
-                                               pair=books[0].symbol, subscribe=False)
-        return None
+                message = self._create_unsubscribe_ticker_request(channel)
+            if message is not None and connection.websocket is not None:
+                await connection.websocket.send(message)
 
-    def _create_unsubscribe_ticker_request(self, channel: Channel) -> Optional[Dict]:
-        pass
+    def _create_unsubscribe_book_request(self, channel: Channel) -> Optional[str]:
+        return self.request_creator.create_message(type=SubscriptionType.book, pair=channel.pair,
+                                                   depth=channel.subscription.depth, subscribe=False)
+
+    def _create_unsubscribe_ticker_request(self, channel: Channel) -> Optional[str]:
+        return self.request_creator.create_message(type=SubscriptionType.ticker,
+                                                   pair=channel.pair, subscribe=False)
 
     async def _connect_socket(self, socket: str) -> None:
         """ Create new websocket connection
         Parameters:
             socket (str) : websocket uri
         """
+        # websockets.client is imported on first connection, processes only using models don't pay for it
+        from websockets import client
+        from websockets.exceptions import ConnectionClosed
         self.logger.debug("Connecting to kraken public websocket: %s", socket)
         websocket = await client.connect(socket)
-        if len(websocket.messages) == 0:
+        try:
+            message = await asyncio.wait_for(websocket.recv(), self.connect_timeout)
+        except (asyncio.TimeoutError, ConnectionClosed):
+            await websocket.close()
             raise SocketConnectionError("Could not connect to kraken websocket: %s", socket)
-        connection = self._handle_connection_message(websocket.messages.pop(), websocket)
+        connection = self._handle_connection_message(message, websocket)
         self.connections.add(connection)
         asyncio.create_task(self._recieve(connection.websocket))
         self.logger.debug("Websocket connection has been created: %s", socket)
@@ -121,11 +288,11 @@ class WebSocket:
     async def _send_public(self, message) -> None:
         """ Send a message to websocket """
         connection = self._get_public_connection()
-        if connection is not None:
+        if connection is not None and connection.websocket is not None:
             await connection.websocket.send(message)
 
     def _handle_connection_message(self, message: Union[str, bytes],
-                                   websocket: client.WebSocketClientProtocol
+                                   websocket: "WebSocketClientProtocol"
                                    ) -> SocketConnection:
         """ Handle recieved connection message """
         if isinstance(message, bytes):
@@ -145,49 +312,124 @@ class WebSocket:
         if isinstance(obj, Ticker):
             self._handle_ticker(obj)
 
+    def _pair_id(self, pair: Optional[str]) -> int:
+        """ Interned id of a pair, -1 when pair is unknown """
+        return -1 if pair is None else self.pairs.intern(pair)
+
     def _handle_ticker(self, ticker: Ticker) -> None:
-        tickers = [t for t in self.tickers if t.channelName == ticker.channelName and t.pair == ticker.pair]
-        if len(tickers) > 0:
-            self.tickers.remove(tickers[0])
-        self.tickers.append(ticker)
+        key = (self._pair_id(ticker.pair), ticker.channelName)
+        position = self._ticker_positions.get(key)
+        if position is None:
+            self._ticker_positions[key] = len(self.tickers)
+            self.tickers.append(ticker)
+        else:
+            self.tickers[position] = ticker
         if self._on_ticker_changed is not None:
-            self._on_ticker_changed()
+            self.callbacks.dispatch(self._on_ticker_changed)
 
     def _handle_order_book(self, book: OrderBook) -> None:
         """ Handle recieved book data """
+        if book.updated is None:
+            book.updated = time.time()
+        pair_id = self._pair_id(book.symbol)
+        key = (pair_id, book.count)
+        position = self._order_book_positions.get(key)
         if book.channelID is not None:
             # new book initialized
-            books = [b for b in self.order_books if b.channelID == book.channelID]
-            if len(books) > 0:
-                books[0] = book
-            else:
-                self.order_books.append(book)
-        else:
+            self.sequencer.snapshot(key)
+            self._install_book(pair_id, key, book)
+        elif position is not None:
             # book data update
-            books = [b for b in self.order_books if b.symbol == book.symbol and b.count == book.count]
-            if len(books) > 0:
-                self._update_book_data(book, books[0])
+            current = self.order_books[position]
+            if not self.sequencer.accept(key, book, current):
+                return
+            changed = self._update_book_data(book, current)
+            if not self.sequencer.verify(key, current, book.checksum):
+                self._handle_gap(key, current)
+            if self.state_store is not None:
+                self.state_store.journal_update(book)
+            self._notify_book_views(pair_id, current, changed)
         if self._on_orderbook_changed is not None:
-            self._on_orderbook_changed()
+            self.callbacks.dispatch(self._on_orderbook_changed)
         self.logger.debug("Order book has been updated: %s", book)
 
-    def _update_book_data(self, data: OrderBook, book: OrderBook) -> None:
+    def _install_book(self, pair_id: int, key: BookKey, book: OrderBook) -> None:
+        """ Add new book or replace the existing one """
+        position = self._order_book_positions.get(key)
+        if position is None:
+            self._order_book_positions[key] = len(self.order_books)
+            self.order_books.append(book)
+        else:
+            self.order_books[position] = book
+        if self.state_store is not None:
+            self.state_store.journal_update(book)
+        self._notify_book_views(pair_id, book, 0)
+
+    def _handle_gap(self, key: BookKey, book: OrderBook) -> None:
+        """ Flag book failing checksum as provisional and schedule its resync """
+        book.provisional = True
+        self.logger.warning("Order book %s %s failed checksum verification", book.symbol, book.count)
+        if not self.resync_on_gap or book.symbol is None or book.depth is None:
+            return
+        if self.state_store is not None and self.state_store.restoring:
+            # journal replay runs before connecting, restored channels are resubscribed with fresh snapshots
+            return
+        if self.sequencer.state(key).resync_pending:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # pending until the snapshot arrives, deltas applied meanwhile fail checksums and must not resync again
+        self.sequencer.begin_resync(key)
+        self._resync_tasks[key] = asyncio.ensure_future(self._resync_book(book.symbol, book.depth))
+
+    async def _resync_book(self, pair: str, depth: int) -> None:
+        try:
+            if self.market_data is not None:
+                await self.bootstrap_book(pair, depth)
+            else:
+                await self._send_public(self.request_creator.create_message(
+                    type=SubscriptionType.book, pair=pair, depth=depth, subscribe=False))
+                await self._subscribe_book(pair, depth)
+        except Exception:
+            self.logger.exception("Order book %s book-%d resync failed", pair, depth)
+            # let the next checksum mismatch retry
+            for update in self.sequencer.abort_bootstrap((self._pair_id(pair), f"book-{depth}")):
+                self._handle_order_book(update)
+
+    def _update_book_data(self, data: OrderBook, book: OrderBook) -> int:
+        """ Apply update to the book
+        :returns: index of the best changed level of both sides
+        """
+        changed = sys.maxsize
         if len(data.asks) > 0:
-            self._update_book_prices(data.asks, book.asks)
+            changed = book.update_asks(data.asks)
         if len(data.bids) > 0:
-            self._update_book_prices(data.bids, book.bids)
-
-    def _update_book_prices(self, data: List[Price], prices: List[Price]):
-        for new_price in data:
-            price = [p for p in prices if p.price == new_price.price]
-            if len(price) == 0:
-                prices.append(new_price)
-                continue
-            if new_price.volume == 0.0:
-                prices.remove(price[0])
-                continue
-            price[0].volume = new_price.volume
-            price[0].timestamp = new_price.timestamp
+            changed = min(changed, book.update_bids(data.bids))
+        depth = book.depth
+        if depth is not None:
+            book.truncate(depth)
+        if data.checksum is not None:
+            book.checksum = data.checksum
+        book.updated = data.updated
+        return changed
+
+    def _notify_book_views(self, pair_id: int, book: OrderBook, changed: int) -> None:
+        """ Notify views of the pair whose depth contains the best changed level """
+        views = self._book_views.get(pair_id)
+        if not views or self._book_view_depths.get(pair_id) != book.depth:
+            return
+        for view in reversed(views):
+            if view.depth <= changed:
+                break
+            view.book = book
+            if view.on_update is not None:
+                self.callbacks.dispatch(view.on_update, view)
+
+    def _get_order_book(self, pair_id: int, depth: int) -> Optional[OrderBook]:
+        position = self._order_book_positions.get((pair_id, f"book-{depth}"))
+        return None if position is None else self.order_books[position]
 
     def _handle_channel(self, channel: Channel) -> None:
         """ Handle channel object recieved """
@@ -199,21 +441,33 @@ class WebSocket:
             if len(channels) > 0:
                 self.channels.remove(channels[0])
                 self.logger.debug("Channel has been unsubscribed: %s", channel)
+                # the book of the channel stops receiving updates, e.g. after a deeper book view replaced it
+                position = self._order_book_positions.get((self._pair_id(channels[0].pair), channels[0].channelName))
+                if position is not None:
+                    self.order_books[position].provisional = True
+
+    @property
+    def disconnecting(self) -> bool:
+        """ Whether connections are being closed right now """
+        return self._disconnect_task is not None and not self._disconnect_task.done()
 
     async def _disconnect_all(self) -> None:
         """ Disconnect all active websocket connections """
-        if not self.disconnecting:
-            self.disconnecting = True
-            for connection in self.connections:
-                if connection.status == ConnectionStatus.online:
-                    await connection.websocket.close()
-                    await asyncio.sleep(2)  # TODO: remove in production
-                    self.logger.debug("Socket connection closed: %s", connection.websocket)
-            self.connections.clear()
-        else:
-            while self.disconnecting:
-                await asyncio.sleep(0)
-        self.disconnecting = False
+        if self._disconnect_task is None or self._disconnect_task.done():
+            self._disconnect_task = asyncio.ensure_future(self._close_connections())
+        await asyncio.shield(self._disconnect_task)
+
+    async def _close_connections(self) -> None:
+        """ Close all online connections concurrently """
+        connections = [c for c in self.connections if c.status == ConnectionStatus.online]
+        await asyncio.gather(*(self._close_connection(c) for c in connections))
+        self.connections.clear()
+
+    async def _close_connection(self, connection: SocketConnection) -> None:
+        """ Close single websocket connection """
+        if connection.websocket is not None:
+            await connection.websocket.close()
+        self.logger.debug("Socket connection closed: %s", connection.websocket)
 
     def _get_public_connection(self) -> Optional[SocketConnection]:
         """ Get public connection with online status """
@@ -228,3 +482,20 @@ class WebSocket:
         self.logger = logging.getLogger(name)
         ws_logger = logging.getLogger("websockets.client")
         ws_logger.setLevel(socket_log_level)
+
+
+def _rest_price(level: List, price_decimals: Optional[int]) -> Price:
+    """ REST Depth level formatted like websocket levels, price is kept as is when its decimals are unknown """
+    price = Decimal(level[0])
+    if price_decimals is not None:
+        price = price.quantize(Decimal(1).scaleb(-price_decimals))
+    volume = Decimal(level[1]).quantize(Decimal(1).scaleb(-BOOK_VOLUME_DECIMALS))
+    return Price(price, volume, Decimal(level[2]))
+
+
+def _price_decimals(book: Optional[OrderBook]) -> Optional[int]:
+    """ Price decimals of websocket levels of the book """
+    levels = book.asks + book.bids if book is not None else []
+    if len(levels) == 0:
+        return None
+    return -int(levels[0].price.as_tuple().exponent)
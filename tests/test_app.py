@@ -9,3 +9,42 @@
 #     with caplog.at_level(logging.DEBUG):
 #         log_message("message")
 #     assert "message" in caplog.text
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from kraken_web_api.app import Runner
+from kraken_web_api.model.runner_config import RunnerConfig
+
+
+def test_runner_config_from_file(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"pairs": ["XBT/USD", "ETH/BTC"], "channels": ["book", "ticker"], "depth": 25}))
+    config = RunnerConfig.from_file(str(path))
+    assert config.pairs == ["XBT/USD", "ETH/BTC"]
+    assert config.channels == ["book", "ticker"]
+    assert config.depth == 25
+    assert config.log_level == "INFO"
+
+
+def test_runner_config_rejects_unknown_channel():
+    with pytest.raises(ValueError, match="trades"):
+        RunnerConfig.from_dict({"pairs": ["XBT/USD"], "channels": ["book", "trades"]})
+
+
+@patch("kraken_web_api.app.WebSocket")
+async def test_runner_subscribes_and_stops(websocket_mock):
+    client = websocket_mock.return_value.__aenter__.return_value
+    client.subscribe_orders_book = AsyncMock()
+    client.subscribe_ticker_info = AsyncMock()
+    runner = Runner(RunnerConfig(pairs=["XBT/USD"], channels=["book", "ticker"], depth=10))
+    task = asyncio.create_task(runner.start())
+    await asyncio.sleep(0)
+    assert not task.done()
+    runner.stop()
+    await asyncio.wait_for(task, 1)
+    client.subscribe_orders_book.assert_awaited_once()
+    client.subscribe_ticker_info.assert_awaited_once()
+    assert websocket_mock.return_value.__aexit__.called
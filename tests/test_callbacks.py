@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from kraken_web_api.callbacks import CallbackDispatcher
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TestCallbackDispatcher:
+
+    def test_sync_callback_failure_is_logged(self, caplog):
+        dispatcher = CallbackDispatcher(LOGGER)
+
+        def failing():
+            raise ValueError("boom")
+
+        with caplog.at_level(logging.ERROR):
+            dispatcher.dispatch(failing)
+        assert "failed" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_coroutine_callback_is_scheduled(self):
+        dispatcher = CallbackDispatcher(LOGGER)
+        called = asyncio.Event()
+
+        async def on_update():
+            called.set()
+
+        dispatcher.dispatch(on_update)
+        assert dispatcher.pending == 1
+        await asyncio.wait_for(called.wait(), 1)
+        await dispatcher.aclose()
+        assert dispatcher.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_callbacks_time_out_and_excess_is_dropped(self, caplog):
+        dispatcher = CallbackDispatcher(LOGGER, max_pending=2, timeout=0.01)
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        with caplog.at_level(logging.WARNING):
+            for _ in range(3):
+                dispatcher.dispatch(slow)
+            assert dispatcher.dropped == 1
+            await asyncio.wait_for(dispatcher.aclose(), 1)
+        assert "timed out" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_sync_callback_runs_in_executor(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            dispatcher = CallbackDispatcher(LOGGER, executor=executor)
+            threads = []
+            dispatcher.dispatch(lambda: threads.append(threading.current_thread()))
+            await dispatcher.aclose()
+        assert threads[0] is not threading.current_thread()
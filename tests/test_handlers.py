@@ -7,6 +7,7 @@ from kraken_web_api.exceptions import InvalidJsonException
 from kraken_web_api.handlers import Handler
 from kraken_web_api.model.order_book import OrderBook
 from kraken_web_api.model.price import Price
+from kraken_web_api.model.ticker import LazyTickerData, TickerData
 
 
 # DATA_LIST = '[2128,{"as":[["0.000702680","5.09240716","1650138439.570743"],["0.000702690","8.30209792","1650138431.584508"],'\
@@ -28,6 +29,13 @@ BOOK_INIT_LIST = [2128, {"as": [["0.000702680", "5.09240716", "1650138439.570743
 BOOK_BID_UPDATE = [2128, {"b": [["0.000707640", "265.70008036", "1650173638.242924"]], "c": "4140403579"}, "book-10", "NANO/ETH"]
 BOOK_ASK_UPDATE = [2128, {"a": [["0.000709420", "173.18000000", "1650173637.897915"]], "c": "3299039756"}, "book-10", "NANO/ETH"]
 
+TICKER_LIST = [340, {"a": ["19364.10000", 0, "0.05498400"], "b": ["19364.00000", 3, "3.69262036"],
+                     "c": ["19364.00000", "0.00037600"], "v": ["2245.87364015", "3524.06128519"],
+                     "p": ["19288.68005", "19237.61829"], "t": [17818, 27627],
+                     "l": ["19030.00000", "19030.00000"], "h": ["19480.30000", "19480.30000"],
+                     "o": ["19186.20000", "19116.30000"]},
+               "ticker", "XBT/USD"]
+
 DATA_LIST_MESSAGE = '[2128,{"as":[["0.000702680","5.09240716","1650138439.570743"],["0.000702690","8.30209792","1650138431.584508"]],\
                     "bs":[["0.000700620","521.46800762","1650138439.347806"],["0.000699890","26.60000000","1650138439.544563"]]},\
                     "book-10","NANO/ETH"]'
@@ -98,3 +106,26 @@ class TestHandlers:
         self.expected_order_book.bids.append(
             Price(Decimal('0.000707640'), Decimal('265.70008036'), Decimal('1650173638.242924')))
         assert order_book == self.expected_order_book
+
+    def test_handle_ticker_data(self):
+        ticker = Handler._handle_ticker_data(TICKER_LIST)
+        assert ticker.channelID == 340
+        assert ticker.channelName == "ticker"
+        assert ticker.pair == "XBT/USD"
+        assert ticker.data.ask == (Decimal("19364.10000"), 0, Decimal("0.05498400"))
+        assert ticker.data.trades == (17818, 27627)
+
+    def test_lazy_ticker_data_parses_on_access(self):
+        data = LazyTickerData(TICKER_LIST[1])
+        assert data._cache == {}
+        close = data.close
+        assert close == (Decimal("19364.00000"), Decimal("0.00037600"))
+        assert data.close is close
+        assert list(data._cache) == ["close"]
+
+    def test_lazy_ticker_data_equals_ticker_data(self):
+        data = LazyTickerData(TICKER_LIST[1])
+        expected = data.to_ticker_data()
+        assert isinstance(expected, TickerData)
+        assert data == expected
+        assert hash(data) == hash(LazyTickerData(TICKER_LIST[1]))
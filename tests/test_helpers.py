@@ -0,0 +1,63 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from kraken_web_api.enums import ChannelStatus, SubscriptionType
+from kraken_web_api.helpers.helpers import from_dataclass_to_dict, from_dict_to_dataclass
+from kraken_web_api.helpers.rate_limiter import DecayingCounter
+from kraken_web_api.model.channel import Channel
+from kraken_web_api.model.price import Price
+from kraken_web_api.model.subscription import Subscription, SubscriptionRequest
+from kraken_web_api.subscribe_creator import SubscribtionRequestCreator
+
+
+class TestHelpers:
+
+    def test_from_dataclass_to_dict_skips_none_and_converts_nested(self):
+        request = SubscriptionRequest(event="subscribe",
+                                      subscription=Subscription(name=SubscriptionType.book, depth=10),
+                                      pair=["ETH/BTC"])
+        assert from_dataclass_to_dict(request) == {
+            "event": "subscribe",
+            "subscription": {"name": "book", "depth": 10},
+            "pair": ["ETH/BTC"],
+        }
+
+    def test_from_dataclass_to_dict_converts_enum_fields(self):
+        channel = Channel("book-10", "subscriptionStatus", ChannelStatus.subscribed,
+                          Subscription(name=SubscriptionType.book, depth=10), "ETH/BTC", 42)
+        result = from_dataclass_to_dict(channel)
+        assert result["status"] == "subscribed"
+        assert result["subscription"] == {"name": "book", "depth": 10}
+
+    def test_from_dict_to_dataclass_uses_defaults_and_decimals(self):
+        subscription = from_dict_to_dataclass(Subscription, {"name": "book", "depth": 10})
+        assert subscription == Subscription(name="book", depth=10)  # type: ignore
+        price = from_dict_to_dataclass(Price, {"price": "1.10", "volume": "2", "timestamp": "3.5"})
+        assert price == Price(Decimal("1.10"), Decimal("2"), Decimal("3.5"))
+
+    def test_create_message_matches_encoded_request(self):
+        creator = SubscribtionRequestCreator()
+        for pair in ("ETH/BTC", "XBT/USD"):
+            request = creator.create(SubscriptionType.book, pair=pair, depth=10, subscribe=True)
+            assert creator.create_message(SubscriptionType.book, pair=pair, depth=10, subscribe=True) == json.dumps(request)
+        assert len(creator._templates) == 1
+
+    def test_decaying_counter_waits_for_decay(self):
+        clock = [100.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+        with patch("kraken_web_api.helpers.rate_limiter.time.monotonic", lambda: clock[0]), \
+                patch("kraken_web_api.helpers.rate_limiter.time.sleep", sleep):
+            counter = DecayingCounter(4, 0.5)
+            counter.acquire(2)
+            counter.acquire(2)
+            assert sleeps == []
+            counter.acquire(2)
+            assert sleeps == [4.0]
+            clock[0] += 10
+            counter.acquire(2)
+            assert sleeps == [4.0]
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+import pytest
+
+import kraken_web_api
+
+
+def imported_modules(statement):
+    """ Modules imported by statement in a fresh interpreter, parsed from ``-X importtime`` output """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, check=True)
+    return {line.rsplit("|", 1)[1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+
+class TestImports:
+
+    def test_package_import_is_lightweight(self):
+        modules = imported_modules("import kraken_web_api")
+        assert not {"kraken_web_api.websocket", "kraken_web_api.client_base", "asyncio", "websockets"} & modules
+
+    def test_websocket_does_not_import_optional_dependencies(self):
+        modules = imported_modules("import kraken_web_api.websocket")
+        assert not {"websockets.client", "requests", "numpy"} & modules
+
+    def test_rest_client_imports_requests_on_instantiation(self):
+        assert "requests" not in imported_modules("import kraken_web_api.market_data")
+        assert "requests" in imported_modules("import kraken_web_api.market_data as m; m.MarketDataClient()")
+
+    def test_lazy_attributes(self):
+        from kraken_web_api.websocket import WebSocket
+        assert kraken_web_api.WebSocket is WebSocket
+        assert kraken_web_api.__getattr__("constants").BOOK_DEPTHS[0] == 10
+        assert "OrderClient" in dir(kraken_web_api)
+        with pytest.raises(AttributeError):
+            kraken_web_api.missing
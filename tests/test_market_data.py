@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+import pytest
+
+from kraken_web_api.exceptions import KrakenApiError
+from kraken_web_api.market_data import MarketDataClient
+
+np = pytest.importorskip("numpy")
+from kraken_web_api.market_cache import MarketDataCache  # noqa: E402
+
+DAY = 1650153600  # 2022-04-17 00:00:00 UTC
+
+
+def trades_response(since):
+    """ Three pages of two trades, the first one spans two days """
+    pages = {
+        None: ([["1.0", "0.5", DAY - 10, "b", "l", ""], ["1.1", "0.6", DAY + 10, "s", "m", ""]], "2"),
+        "2": ([["1.2", "0.7", DAY + 20, "b", "m", ""], ["1.3", "0.8", DAY + 30, "s", "l", ""]], "4"),
+        "4": ([], "4"),
+    }
+    rows, last = pages[since]
+    return {"error": [], "result": {"XXBTZUSD": rows, "last": last}}
+
+
+class TestMarketData:
+
+    def setup_method(self):
+        self.client = MarketDataClient(max_workers=2, calls_per_second=0)
+
+    @patch("kraken_web_api.market_data.TRADES_PAGE_SIZE", 2)
+    @patch("kraken_web_api.client_base.ApiClientBase._query_public")
+    def test_iter_trades_follows_cursor(self, query_mock):
+        query_mock.side_effect = lambda method, data: trades_response(data.get("since"))
+        pages = list(self.client.iter_trades("XBTUSD"))
+        assert [last for _, last in pages] == ["2", "4"]
+        assert query_mock.call_count == 3
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_public")
+    def test_depth_many_fetches_every_pair(self, query_mock):
+        query_mock.side_effect = lambda method, data: {"error": [], "result": {data["pair"].upper(): {"asks": [], "bids": []}}}
+        books = self.client.depth_many(["XBTUSD", "ETHUSD", "ETHXBT"], count=10)
+        assert list(books) == ["XBTUSD", "ETHUSD", "ETHXBT"]
+        assert query_mock.call_count == 3
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_public")
+    def test_api_error_raises(self, query_mock):
+        query_mock.return_value = {"error": ["EQuery:Unknown asset pair"], "result": {}}
+        with pytest.raises(KrakenApiError):
+            self.client.depth("NOPE")
+
+    @patch("kraken_web_api.market_data.TRADES_PAGE_SIZE", 2)
+    @patch("kraken_web_api.client_base.ApiClientBase._query_public")
+    def test_backfill_trades_is_incremental(self, query_mock, tmp_path):
+        query_mock.side_effect = lambda method, data: trades_response(data.get("since"))
+        self.client.cache = MarketDataCache(str(tmp_path))
+        assert self.client.backfill_trades(["XBT/USD"]) == {"XBT/USD": 4}
+        assert self.client.cache.trade_days("XBT/USD") == ["2022-04-16", "2022-04-17"]
+        trades = self.client.cache.read_trades("XBT/USD", "2022-04-17")
+        assert isinstance(trades, np.memmap)
+        assert trades["price"].tolist() == [1.1, 1.2, 1.3]
+        assert self.client.cache.trades_cursor("XBT/USD") == "4"
+
+        query_mock.reset_mock()
+        assert self.client.backfill_trades(["XBT/USD"]) == {"XBT/USD": 0}
+        assert query_mock.call_args.args[1]["since"] == "4"
+
+    def test_interrupted_trade_page_is_not_duplicated(self, tmp_path):
+        cache = MarketDataCache(str(tmp_path))
+        first = trades_response(None)["result"]["XXBTZUSD"]
+        second = trades_response("2")["result"]["XXBTZUSD"]
+        cache.write_trades("XBT/USD", first, "2")
+        # page appended, but the process died before its cursor was stored
+        with patch.object(MarketDataCache, "_write_cursor", side_effect=OSError):
+            with pytest.raises(OSError):
+                cache.write_trades("XBT/USD", second, "4")
+        assert cache.trades_cursor("XBT/USD") == "2"
+        cache.write_trades("XBT/USD", second, "4")
+        assert cache.read_trades("XBT/USD", "2022-04-17")["price"].tolist() == [1.1, 1.2, 1.3]
+        assert cache.read_trades("XBT/USD", "2022-04-16")["price"].tolist() == [1.0]
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_public")
+    def test_backfill_ohlc_replaces_open_candle(self, query_mock, tmp_path):
+        candles = [[DAY, "1", "2", "0.5", "1.5", "1.2", "10", 5], [DAY + 60, "1.5", "1.6", "1.4", "1.5", "1.5", "1", 1]]
+        query_mock.return_value = {"error": [], "result": {"XXBTZUSD": candles, "last": DAY}}
+        self.client.cache = MarketDataCache(str(tmp_path))
+        self.client.backfill_ohlc(["XBT/USD"])
+        candles[1][4] = "1.55"
+        self.client.backfill_ohlc(["XBT/USD"])
+        ohlc = self.client.cache.read_ohlc("XBT/USD", 1, "2022-04-17")
+        assert ohlc["time"].tolist() == [DAY, DAY + 60]
+        assert ohlc["close"].tolist() == [1.5, 1.55]
@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+import pytest
+
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+
+np = pytest.importorskip("numpy")
+from kraken_web_api import book_analytics  # noqa: E402
+
+
+def price(p: str, v: str) -> Price:
+    return Price(Decimal(p), Decimal(v), Decimal("1650138439.570743"))
+
+
+def make_book() -> OrderBook:
+    return OrderBook(1, "book-10", "XBT/USD",
+                     [price("101", "1"), price("102", "2"), price("104", "4")],
+                     [price("100", "1"), price("99", "3"), price("97", "5")])
+
+
+class TestOrderBook:
+
+    def test_updates_keep_levels_sorted(self):
+        book = make_book()
+        book.update_asks([price("103", "3"), price("101", "0"), price("104", "1.5"), price("105", "0")])
+        book.update_bids([price("98", "2"), price("100.5", "1")])
+        assert [(str(p.price), str(p.volume)) for p in book.asks] == [("102", "2"), ("103", "3"), ("104", "1.5")]
+        assert [str(p.price) for p in book.bids] == ["100.5", "100", "99", "98", "97"]
+
+    def test_to_numpy_stays_in_sync(self):
+        book = make_book()
+        arrays = book.to_numpy()
+        assert arrays.asks.tolist() == [[101, 1], [102, 2], [104, 4]]
+        assert not arrays.asks.flags.writeable
+        book.update_asks([price("103", "3"), price("101", "0"), price("104", "1.5")])
+        book.update_bids([price("98", "2")] + [price(str(90 - i), "1") for i in range(40)])
+        arrays = book.to_numpy()
+        assert arrays.asks.tolist() == [[float(p.price), float(p.volume)] for p in book.asks]
+        assert arrays.bids.tolist() == [[float(p.price), float(p.volume)] for p in book.bids]
+        assert arrays.bids.flags.c_contiguous
+
+
+class TestBookAnalytics:
+
+    def setup_method(self):
+        self.arrays = make_book().to_numpy()
+
+    def test_cumulative_depth(self):
+        assert book_analytics.cumulative_depth(self.arrays.asks).tolist() == [1, 3, 7]
+
+    def test_vwap_to_size(self):
+        assert book_analytics.vwap_to_size(self.arrays.asks, 2) == pytest.approx((101 + 102) / 2)
+        assert np.isnan(book_analytics.vwap_to_size(self.arrays.asks, 8))
+
+    def test_slippage(self):
+        assert book_analytics.slippage(self.arrays.asks, 101) == 0
+        average_price = 305 / (1 + 204 / 102)
+        assert book_analytics.slippage(self.arrays.asks, 305) == pytest.approx((average_price - 101) / 101)
+        average_price = 199 / (1 + 99 / 99)
+        assert book_analytics.slippage(self.arrays.bids, 199) == pytest.approx((100 - average_price) / 100)
+
+    def test_imbalance_and_microprice(self):
+        assert book_analytics.imbalance(self.arrays, levels=2) == pytest.approx((4 - 3) / 7)
+        assert book_analytics.microprice(self.arrays) == pytest.approx((101 * 1 + 100 * 1) / 2)
@@ -0,0 +1,100 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from kraken_web_api.model.api_parameters import ApiParameters
+from kraken_web_api.model.order import OrderRequest
+from kraken_web_api.orders import OrderClient
+
+
+def closed_order(txid):
+    return {"descr": {"pair": "XBTUSD", "type": "buy", "ordertype": "limit", "price": "100.0"},
+            "vol": "1.0", "vol_exec": "1.0", "status": "closed", "opentm": 1650153600.1, "closetm": 1650153601.2}
+
+
+def closed_response(ofs):
+    """ Five closed orders returned in pages of two """
+    txids = [f"O{i}" for i in range(5)][ofs:ofs + 2]
+    return {"error": [], "result": {"closed": {txid: closed_order(txid) for txid in txids}, "count": 5}}
+
+
+class TestOrders:
+
+    def setup_method(self):
+        self.client = OrderClient(ApiParameters("key", "c2VjcmV0"), max_workers=2)
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_private")
+    def test_add_order_batch_is_chunked(self, query_mock):
+        def add_batch(method, data, json_body):
+            assert method == "AddOrderBatch" and json_body
+            return {"error": [], "result": {"orders": [{"txid": o["price"]} for o in data["orders"]]}}
+        query_mock.side_effect = add_batch
+        orders = [OrderRequest("buy", "limit", "1", price=str(i)) for i in range(32)]
+        txids = self.client.add_order_batch("XBTUSD", orders)
+        assert txids == [str(i) for i in range(32)]
+        assert query_mock.call_count == 3
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_private")
+    def test_add_order_batch_has_no_single_order_batches(self, query_mock):
+        def add(method, data, json_body):
+            if method == "AddOrder":
+                return {"error": [], "result": {"txid": [data["price"]]}}
+            assert 2 <= len(data["orders"]) <= 15
+            return {"error": [], "result": {"orders": [{"txid": o["price"]} for o in data["orders"]]}}
+        query_mock.side_effect = add
+        orders = [OrderRequest("buy", "limit", "1", price=str(i)) for i in range(16)]
+        assert self.client.add_order_batch("XBTUSD", orders) == [str(i) for i in range(16)]
+        assert [len(c.args[1]["orders"]) for c in query_mock.call_args_list] == [8, 8]
+
+        query_mock.reset_mock()
+        assert self.client.add_order_batch("XBTUSD", orders[:1]) == ["0"]
+        assert query_mock.call_args.args[0] == "AddOrder"
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_private")
+    def test_cancel_order_batch_sums_counts(self, query_mock):
+        query_mock.side_effect = lambda method, data, json_body: {"error": [], "result": {"count": len(data["orders"])}}
+        assert self.client.cancel_order_batch([f"O{i}" for i in range(120)]) == 120
+        assert query_mock.call_count == 3
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_private")
+    def test_closed_orders_fetches_all_pages(self, query_mock):
+        query_mock.side_effect = lambda method, data, json_body: closed_response(data["ofs"])
+        orders = self.client.closed_orders(start=1650153600)
+        assert [o.txid for o in orders] == ["O0", "O1", "O2", "O3", "O4"]
+        assert orders[0].closetm == 1650153601.2
+        assert sorted(c.args[1]["ofs"] for c in query_mock.call_args_list) == [0, 2, 4]
+        assert all(c.args[1]["start"] == 1650153600 for c in query_mock.call_args_list)
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_private")
+    def test_closed_orders_shifted_pages_are_deduplicated(self, query_mock):
+        # a new order closed after the first page shifted O1 to the second page
+        query_mock.side_effect = lambda method, data, json_body: closed_response(max(data["ofs"] - 1, 0))
+        orders = self.client.closed_orders()
+        assert [o.txid for o in orders] == ["O0", "O1", "O2", "O3", "O4"]
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query_private")
+    def test_history_calls_count_double(self, query_mock):
+        query_mock.side_effect = lambda method, data, json_body: closed_response(data["ofs"])
+        self.client.counter = MagicMock()
+        self.client.closed_orders()
+        query_mock.side_effect = lambda method, data, json_body: {"error": [], "result": {"count": 1}}
+        self.client.cancel_order("O1")
+        assert [c.args[0] for c in self.client.counter.acquire.call_args_list] == [2, 2, 2, 0]
+
+    def test_default_client_is_sequential(self):
+        client = OrderClient(ApiParameters("key", "c2VjcmV0"))
+        assert client.max_workers == 1
+        assert client.counter.max_count > 0
+
+    @patch("kraken_web_api.client_base.ApiClientBase._query")
+    def test_json_body_is_signed(self, query_mock):
+        query_mock.return_value = {"error": [], "result": {"count": 1}}
+        self.client.cancel_order_batch(["O1"])
+        urlpath, body, headers = query_mock.call_args.args
+        assert urlpath == "/0/private/CancelOrderBatch"
+        assert json.loads(body)["orders"] == ["O1"]
+        assert headers["Content-Type"] == "application/json"
+        assert headers["API-Sign"] == self.client._sign(json.loads(body), urlpath, body)
+
+    def test_nonce_is_strictly_increasing(self):
+        nonces = [self.client._nonce() for _ in range(100)]
+        assert nonces == sorted(set(nonces))
@@ -0,0 +1,65 @@
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from kraken_web_api.pairs import PairRegistry
+
+ASSET_PAIRS = {
+    "XXBTZUSD": {"altname": "XBTUSD", "wsname": "XBT/USD", "base": "XXBT", "quote": "ZUSD",
+                 "pair_decimals": 1, "lot_decimals": 8, "tick_size": "0.1"},
+    "XETHXXBT": {"altname": "ETHXBT", "wsname": "ETH/XBT", "base": "XETH", "quote": "XXBT",
+                 "pair_decimals": 5, "lot_decimals": 8},
+}
+
+
+class TestPairRegistry:
+
+    def setup_method(self):
+        self.registry = PairRegistry()
+
+    def test_aliases_share_id(self):
+        self.registry.load(ASSET_PAIRS)
+        pair_id = self.registry.intern("XBT/USD")
+        for alias in ("XXBTZUSD", "XBTUSD", "BTC/USD", "BTCUSD", "xbt/usd"):
+            assert self.registry.intern(alias) == pair_id
+        assert self.registry.normalize("BTC/USD") == "XBT/USD"
+        assert self.registry.intern("ETH/BTC") != pair_id
+
+    def test_metadata(self):
+        self.registry.load(ASSET_PAIRS)
+        info = self.registry.get("ETH/BTC")
+        assert info is not None
+        assert info.name == "ETH/XBT"
+        assert info.lot_decimals == 8
+        assert info.tick_size == Decimal("0.00001")
+        assert self.registry.get("XBTUSD").tick_size == Decimal("0.1")
+
+    def test_unknown_pair_keeps_id_after_load(self):
+        pair_id = self.registry.intern("BTC/USD")
+        assert self.registry.info(pair_id) is None
+        self.registry.load(ASSET_PAIRS)
+        assert self.registry.intern("XXBTZUSD") == pair_id
+        assert self.registry.info(pair_id).altname == "XBTUSD"
+
+    def test_aliases_interned_before_load_are_merged(self):
+        ids = [self.registry.intern(name) for name in ("XBT/USD", "XXBTZUSD", "XBTUSD")]
+        assert len(set(ids)) == 3
+        self.registry.load(ASSET_PAIRS)
+        for name in ("XBT/USD", "XXBTZUSD", "XBTUSD", "BTC/USD"):
+            assert self.registry.intern(name) == ids[0]
+        for pair_id in ids:
+            assert self.registry.info(pair_id).altname == "XBTUSD"
+            assert self.registry.name(pair_id) == "XBT/USD"
+
+    def test_load_cached_persists_rest_result(self, tmp_path):
+        path = str(tmp_path / "asset_pairs.json")
+        client = MagicMock()
+        client._result.return_value = ASSET_PAIRS
+        self.registry.load_cached(client, path)
+        assert client._query_public.call_args.args[0] == "AssetPairs"
+        with open(path) as file:
+            assert json.load(file)["pairs"] == ASSET_PAIRS
+
+        registry = PairRegistry()
+        registry.load_cached(MagicMock(side_effect=AssertionError), path)
+        assert registry.normalize("BTCUSD") == "XBT/USD"
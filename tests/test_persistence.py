@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from decimal import Decimal
+
+from kraken_web_api.enums import ChannelStatus, SubscriptionType
+from kraken_web_api.model.channel import Channel
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+from kraken_web_api.model.subscription import Subscription
+from kraken_web_api.persistence import StateStore
+from kraken_web_api.simulator import KrakenSimulator
+from kraken_web_api.websocket import WebSocket
+
+
+def price(p: str, v: str) -> Price:
+    return Price(Decimal(p), Decimal(v), Decimal("1650138439.570743"))
+
+
+class TestStateStore:
+
+    def setup_method(self):
+        self.ws_client = WebSocket(name="TestStateStore", socket_log_level=logging.NOTSET)
+
+    def test_restore_snapshot_and_journal(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        self.ws_client.state_store = store
+        self.ws_client.channels.add(Channel("book-10", "subscriptionStatus", ChannelStatus.subscribed,
+                                            Subscription(name=SubscriptionType.book, depth=10), "XBT/EUR", 7))
+        self.ws_client._handle_order_book(OrderBook(7, "book-10", "XBT/EUR", [price("101", "1")], [price("100", "1")]))
+        store.write_snapshot(self.ws_client)
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/EUR", [price("100.5", "2")], [], checksum="123"))
+        store.close()
+
+        restored = WebSocket(name="TestStateStoreRestored", socket_log_level=logging.NOTSET)
+        restored_store = StateStore(str(tmp_path))
+        assert restored_store.restore(restored) == 1
+        book = restored.order_books[0]
+        assert book == self.ws_client.order_books[0]
+        assert book.provisional
+        assert book.checksum == "123"
+        assert book.updated == self.ws_client.order_books[0].updated
+        assert restored_store.channels[0].pair == "XBT/EUR"
+        assert restored_store.channels[0].subscription.depth == 10
+
+        restored._handle_order_book(OrderBook(8, "book-10", "XBT/EUR", [price("102", "1")], [price("99", "1")]))
+        assert len(restored.order_books) == 1
+        assert not restored.order_books[0].provisional
+
+    def test_restore_replays_book_replacements(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        self.ws_client.state_store = store
+        self.ws_client._handle_order_book(OrderBook(7, "book-10", "XBT/EUR", [price("101", "1")], [price("100", "1")]))
+        store.write_snapshot(self.ws_client)
+        # live snapshot after a resubscribe replaces the book, then a delta follows
+        self.ws_client._handle_order_book(OrderBook(8, "book-10", "XBT/EUR", [price("200", "1")], [price("198", "1")]))
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/EUR", [], [price("199", "2")]))
+        store.close()
+
+        restored = WebSocket(name="TestStateStoreRestored", socket_log_level=logging.NOTSET)
+        restored_store = StateStore(str(tmp_path))
+        assert restored_store.restore(restored) == 1
+        assert restored.order_books == self.ws_client.order_books
+        assert restored.order_books[0].provisional
+        with open(restored_store.journal_path) as file:
+            assert file.read() == ""
+
+        # a later run appends to a fresh journal on top of the snapshot written by restore
+        restored.state_store = restored_store
+        restored._handle_order_book(OrderBook(None, "book-10", "XBT/EUR", [price("201", "1")], []))
+        restored_store.close()
+        again = WebSocket(name="TestStateStoreRestoredAgain", socket_log_level=logging.NOTSET)
+        assert StateStore(str(tmp_path)).restore(again) == 1
+        assert [p.price for p in again.order_books[0].asks] == [Decimal(200), Decimal(201)]
+        assert [p.price for p in again.order_books[0].bids] == [Decimal(199), Decimal(198)]
+
+    def test_journal_is_truncated_by_snapshot_and_survives_cut_line(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        self.ws_client.state_store = store
+        self.ws_client._handle_order_book(OrderBook(7, "book-10", "XBT/EUR", [price("101", "1")], []))
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/EUR", [price("102", "1")], []))
+        store.write_snapshot(self.ws_client)
+        store.close()
+        with open(store.journal_path) as file:
+            assert file.read() == ""
+        with open(store.journal_path, "a") as file:
+            file.write('{"channelID":null,"count":"book-10"')
+
+        restored = WebSocket(name="TestStateStoreRestored", socket_log_level=logging.NOTSET)
+        assert StateStore(str(tmp_path)).restore(restored) == 1
+        assert [p.price for p in restored.order_books[0].asks] == [Decimal(101), Decimal(102)]
+
+    async def test_snapshot_is_written_in_executor(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        self.ws_client.state_store = store
+        self.ws_client._handle_order_book(OrderBook(7, "book-10", "XBT/EUR", [price("101.0", "1.00000000")],
+                                                    [price("100.0", "0.10000000")], checksum="42"))
+        await store.save_snapshot(self.ws_client)
+        store.close()
+        with open(store.snapshot_path, "rb") as file:
+            assert file.read(4) == b"KWS2"
+
+        restored = WebSocket(name="TestStateStoreRestored", socket_log_level=logging.NOTSET)
+        assert StateStore(str(tmp_path)).restore(restored) == 1
+        book = restored.order_books[0]
+        assert book == self.ws_client.order_books[0]
+        assert (book.channelID, book.count, book.symbol, book.checksum) == (7, "book-10", "XBT/EUR", "42")
+        # digits are kept as received, checksums are computed from them
+        assert [format(p.volume, "f") for p in book.asks + book.bids] == ["1.00000000", "0.10000000"]
+
+    def test_journals_survive_interrupted_snapshot(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        self.ws_client.state_store = store
+        self.ws_client._handle_order_book(OrderBook(7, "book-10", "XBT/EUR", [price("101", "1")], []))
+        store.write_snapshot(self.ws_client)
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/EUR", [price("102", "1")], []))
+        # next snapshot switched journals but never reached the disk
+        store._copy_state(self.ws_client)
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/EUR", [price("103", "1")], []))
+        store.close()
+
+        restored = WebSocket(name="TestStateStoreRestored", socket_log_level=logging.NOTSET)
+        assert StateStore(str(tmp_path)).restore(restored) == 1
+        assert restored.order_books == self.ws_client.order_books
+
+    async def test_restore_does_not_resync_gaps(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        self.ws_client.state_store = store
+        self.ws_client.resync_on_gap = False
+        self.ws_client._handle_order_book(OrderBook(7, "book-10", "XBT/EUR", [price("101", "1")], []))
+        store.write_snapshot(self.ws_client)
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/EUR", [price("102", "1")], [], checksum="1"))
+        store.close()
+
+        restored = WebSocket(name="TestStateStoreRestored", socket_log_level=logging.NOTSET,
+                             socket_uri="ws://127.0.0.1:1", state_store=StateStore(str(tmp_path)))
+        assert restored.state_store.restore(restored) == 1
+        assert restored.order_books[0].provisional
+        assert restored._resync_tasks == {}
+        assert not restored.sequencer.state((restored._pair_id("XBT/EUR"), "book-10")).resync_pending
+
+    async def test_clean_shutdown_keeps_channels(self, tmp_path):
+        async with KrakenSimulator(book_rate=100, ticker_rate=0) as simulator:
+            async with WebSocket(socket_uri=simulator.uri, state_store=StateStore(str(tmp_path))) as client:
+                await client.subscribe_orders_book("XBT/USD", 10)
+                while len(client.order_books) == 0 or len(client.channels) == 0:
+                    await asyncio.sleep(0.01)
+
+        restored_store = StateStore(str(tmp_path))
+        assert restored_store.restore(WebSocket(name="TestStateStoreRestored", socket_log_level=logging.NOTSET)) == 1
+        assert [c.pair for c in restored_store.channels] == ["XBT/USD"]
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+import threading
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from kraken_web_api.enums import SequenceStatus
+from kraken_web_api.handlers import Handler
+from kraken_web_api.helpers.checksum import book_checksum
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+from kraken_web_api.pairs import PairRegistry
+from kraken_web_api.sequencing import BookSequencer
+from kraken_web_api.websocket import WebSocket
+
+KEY = (0, "book-10")
+
+
+def price(p: str, v: str, t: str) -> Price:
+    return Price(Decimal(p), Decimal(v), Decimal(t))
+
+
+def book() -> OrderBook:
+    return OrderBook(1, "book-10", "XBT/USD", [price("101", "1", "10"), price("102", "1", "10")],
+                     [price("100", "1", "10"), price("99", "1", "10")])
+
+
+class TestBookSequencer:
+
+    def setup_method(self):
+        self.sequencer = BookSequencer()
+
+    def test_out_of_order_levels_are_dropped(self):
+        update = OrderBook(None, "book-10", "XBT/USD", [price("101", "2", "9"), price("103", "1", "9")],
+                           [price("100", "0", "11")])
+        assert self.sequencer.accept(KEY, update, book())
+        assert update.asks == [price("103", "1", "9")]
+        assert update.bids == [price("100", "0", "11")]
+        assert self.sequencer.state(KEY).stale == 1
+
+    def test_checksum_mismatch_is_a_gap(self):
+        current = book()
+        assert self.sequencer.verify(KEY, current, str(book_checksum(current.asks, current.bids)))
+        assert not self.sequencer.verify(KEY, current, "1")
+        assert self.sequencer.state(KEY).status is SequenceStatus.gap
+        assert self.sequencer.state(KEY).gaps == 1
+
+    def test_splice_drops_updates_older_than_snapshot(self):
+        self.sequencer.begin_bootstrap(KEY)
+        older = OrderBook(None, "book-10", "XBT/USD", [price("101", "5", "9"), price("101.5", "1", "9")], [])
+        newer = OrderBook(None, "book-10", "XBT/USD", [price("101", "3", "11")], [price("100.5", "1", "11")])
+        assert not self.sequencer.accept(KEY, older, book())
+        assert not self.sequencer.accept(KEY, newer, book())
+        updates = self.sequencer.splice(KEY, book())
+        assert updates == [OrderBook(None, "book-10", "XBT/USD", [], []), newer]
+        assert self.sequencer.state(KEY).stale == 2
+        assert self.sequencer.state(KEY).status is SequenceStatus.live
+
+    def test_websocket_snapshot_supersedes_bootstrap(self):
+        self.sequencer.begin_bootstrap(KEY)
+        self.sequencer.accept(KEY, OrderBook(None, "book-10", "XBT/USD", [price("101", "5", "11")], []), book())
+        self.sequencer.snapshot(KEY)
+        assert self.sequencer.splice(KEY, book()) is None
+
+
+class TestWebSocketSequencing:
+
+    def setup_method(self):
+        self.ws_client = WebSocket(name="TestSequencing", socket_log_level=logging.NOTSET)
+
+    def test_update_of_both_sides_is_applied(self):
+        self.ws_client._handle_order_book(book())
+        expected = OrderBook(1, "book-10", "XBT/USD", [price("101", "2", "11"), price("102", "1", "10")],
+                             [price("100", "3", "11"), price("99", "1", "10")])
+        message = [1, {"a": [["101", "2", "11"]]}, {"b": [["100", "3", "11"]], "c": str(book_checksum(expected.asks, expected.bids))},
+                   "book-10", "XBT/USD"]
+        self.ws_client._handle_object(Handler.handle_message(json.dumps(message)))
+        assert self.ws_client.order_books[0] == expected
+        expected.update_asks([price("101", "0", "12")])
+        message = [1, {"a": [["101", "0", "12"]], "c": str(book_checksum(expected.asks, expected.bids))}, "book-10", "XBT/USD"]
+        self.ws_client._handle_object(Handler.handle_message(json.dumps(message)))
+        assert self.ws_client.sequencer.state((self.ws_client._pair_id("XBT/USD"), "book-10")).gaps == 0
+        assert not self.ws_client.order_books[0].provisional
+
+    async def test_gap_resubscribes_book(self):
+        self.ws_client._handle_order_book(book())
+        with patch.object(self.ws_client, "_send_public") as send_mock, \
+                patch.object(self.ws_client, "_get_public_connection", return_value=MagicMock()):
+            for index in range(5):
+                gap = OrderBook(None, "book-10", "XBT/USD", [price("101", str(index + 2), "11")], [], checksum="1")
+                self.ws_client._handle_order_book(gap)
+                await asyncio.gather(*self.ws_client._resync_tasks.values())
+            assert self.ws_client.order_books[0].provisional
+        messages = [c.args[0] for c in send_mock.call_args_list]
+        assert len(messages) == 2
+        assert '"event": "unsubscribe"' in messages[0] and '"event": "subscribe"' in messages[1]
+        state = self.ws_client.sequencer.state((self.ws_client._pair_id("XBT/USD"), "book-10"))
+        assert state.gaps == 1 and state.resync_pending
+
+        self.ws_client._handle_order_book(book())
+        assert not state.resync_pending
+        assert not self.ws_client.order_books[0].provisional
+
+    async def test_bootstrap_book_splices_buffered_updates(self):
+        self.ws_client._handle_order_book(book())
+        released = threading.Event()
+
+        def depth(pair, count):
+            released.wait(5)
+            return {"asks": [["101.0", "4", 11], ["102", "1", 10]], "bids": [["100", "1", 10], ["99", "1", 10]]}
+        client = MagicMock()
+        client.depth.side_effect = depth
+        key = (self.ws_client._pair_id("XBT/USD"), "book-10")
+        task = asyncio.ensure_future(self.ws_client.bootstrap_book("XBT/USD", 10, client))
+        while self.ws_client.sequencer.state(key).status is not SequenceStatus.bootstrapping:
+            await asyncio.sleep(0)
+        # REST levels get the price digits of the websocket book and 8 volume decimals
+        expected = OrderBook(1, "book-10", "XBT/USD", [price("101", "4.00000000", "11"), price("102", "1.00000000", "10")],
+                             [price("100.5", "2", "12"), price("100", "1.00000000", "10"), price("99", "1.00000000", "10")])
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/USD", [price("101", "3", "10.5")], []))
+        checksum = str(book_checksum(expected.asks, expected.bids))
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/USD", [], [price("100.5", "2", "12")],
+                                                    checksum=checksum))
+        assert self.ws_client.order_books[0] == book()
+        released.set()
+
+        result = await task
+        assert result is self.ws_client.order_books[0]
+        assert result == expected
+        assert not result.provisional
+        assert self.ws_client.sequencer.state(key).gaps == 0
+        client.depth.assert_called_once_with("XBTUSD", 20)
+
+    async def test_bootstrap_book_uses_websocket_digits(self):
+        pairs = PairRegistry()
+        pairs.load({"XXBTZUSD": {"altname": "XBTUSD", "wsname": "XBT/USD", "base": "XXBT", "quote": "ZUSD",
+                                 "pair_decimals": 1, "lot_decimals": 8}})
+        self.ws_client = WebSocket(name="TestSequencing", socket_log_level=logging.NOTSET, pairs=pairs)
+        client = MagicMock()
+        client.depth.return_value = {"asks": [["101.0", "1.089", 11], ["102.0", "2", 10]],
+                                     "bids": [["100.0", "0.5", 10], ["99.0", "3", 10]]}
+        with patch.object(self.ws_client, "_subscribe_book") as subscribe_mock:
+            result = await self.ws_client.bootstrap_book("XBT/USD", 10, client)
+        subscribe_mock.assert_called_once_with("XBT/USD", 10)
+        assert [format(p.volume, "f") for p in result.asks] == ["1.08900000", "2.00000000"]
+        websocket_asks = [price("101.0", "1.08900000", "11"), price("102.0", "2.00000000", "10")]
+        websocket_bids = [price("100.0", "0.50000000", "10"), price("99.0", "3.00000000", "10")]
+        expected = book_checksum(websocket_asks, websocket_bids)
+        assert book_checksum(result.asks, result.bids) == expected
+
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/USD", [], [price("99.0", "3.00000000", "12")],
+                                                    checksum=str(expected)))
+        assert self.ws_client.sequencer.state((pairs.intern("XBT/USD"), "book-10")).gaps == 0
@@ -0,0 +1,68 @@
+import asyncio
+import json
+import zlib
+from decimal import Decimal
+
+import pytest
+import websockets
+
+from kraken_web_api.helpers.checksum import book_checksum
+from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+from kraken_web_api.simulator import KrakenSimulator
+from kraken_web_api.websocket import WebSocket
+
+
+def to_prices(records):
+    return [Price(Decimal(r[0]), Decimal(r[1]), Decimal(r[2])) for r in records]
+
+
+class TestSimulator:
+
+    def test_book_checksum(self):
+        asks = [Price(Decimal("0.05005"), Decimal("0.00000500"), Decimal(0))]
+        bids = [Price(Decimal("0.05000"), Decimal("1.00000000"), Decimal(0))]
+        assert book_checksum(asks, bids) == zlib.crc32(b"5005500" + b"5000100000000")
+
+    @pytest.mark.asyncio
+    async def test_book_updates_have_valid_checksums(self):
+        async with KrakenSimulator(book_rate=2000, seed=1) as simulator:
+            async with websockets.connect(simulator.uri) as websocket:
+                assert json.loads(await websocket.recv())["status"] == "online"
+                await websocket.send(json.dumps({"event": "subscribe", "pair": ["XBT/USD"],
+                                                 "subscription": {"name": "book", "depth": 10}}))
+                status = json.loads(await websocket.recv())
+                assert status["status"] == "subscribed"
+                snapshot = json.loads(await websocket.recv())
+                book = OrderBook(status["channelID"], "book-10", "XBT/USD",
+                                 to_prices(snapshot[1]["as"]), to_prices(snapshot[1]["bs"]))
+                both_sides = 0
+                for _ in range(200):
+                    update = json.loads(await websocket.recv())
+                    for data in update[1:-2]:
+                        book.update_asks(to_prices(data.get("a", [])))
+                        book.update_bids(to_prices(data.get("b", [])))
+                    both_sides += len(update) == 5
+                    del book.asks[10:]
+                    del book.bids[10:]
+                    assert str(book_checksum(book.asks, book.bids)) == update[-3]["c"]
+                assert both_sides > 0
+
+    @pytest.mark.asyncio
+    async def test_client_receives_books_and_tickers(self):
+        async with KrakenSimulator(book_rate=200, ticker_rate=200) as simulator:
+            async with WebSocket(socket_uri=simulator.uri) as client:
+                updated = asyncio.Event()
+                await client.subscribe_orders_book("XBT/USD", 10, updated.set)
+                await client.subscribe_ticker_info("ETH/USD")
+                await asyncio.wait_for(updated.wait(), 2)
+
+                async def subscribed():
+                    while len(client.channels) < 2 or len(client.tickers) == 0:
+                        await asyncio.sleep(0.01)
+
+                await asyncio.wait_for(subscribed(), 2)
+                assert client.order_books[0].symbol == "XBT/USD"
+                assert client.tickers[0].pair == "ETH/USD"
+                # every simulated update carries a valid checksum
+                assert client.sequencer.state((client._pair_id("XBT/USD"), "book-10")).gaps == 0
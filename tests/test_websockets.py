@@ -1,12 +1,17 @@
+import asyncio
 import json
+from decimal import Decimal
 import logging
 from unittest.mock import MagicMock, patch
 import pytest
 from websockets.client import WebSocketClientProtocol
 
-from kraken_web_api.enums import ConnectionStatus
+from kraken_web_api.enums import ChannelStatus, ConnectionStatus, SubscriptionType
+from kraken_web_api.model.channel import Channel
 from kraken_web_api.model.connection import SocketConnection
 from kraken_web_api.model.order_book import OrderBook
+from kraken_web_api.model.price import Price
+from kraken_web_api.model.subscription import Subscription
 from kraken_web_api.websocket import WebSocket
 
 
@@ -66,3 +71,91 @@ class TestWebsocket:
         assert handler_mock.handle_message.called
         assert len(books) > 0
         assert self.ws_client._on_orderbook_changed.called
+
+    @pytest.mark.asyncio
+    async def test_disconnect_all_closes_connections_concurrently(self):
+        closing = []
+        release = asyncio.Event()
+
+        async def close():
+            closing.append(True)
+            await release.wait()
+
+        for connection_id in ("1", "2"):
+            websocket = MagicMock()
+            websocket.close = close
+            self.ws_client.connections.add(SocketConnection(connection_id, "systemStatus", ConnectionStatus.online,
+                                                            "1.9.0", websocket))
+        first = asyncio.create_task(self.ws_client._disconnect_all())
+        second = asyncio.create_task(self.ws_client._disconnect_all())
+
+        async def both_closing():
+            while len(closing) < 2:
+                await asyncio.sleep(0)
+
+        await asyncio.wait_for(both_closing(), 1)
+        assert self.ws_client.disconnecting
+        release.set()
+        await asyncio.wait_for(asyncio.gather(first, second), 1)
+        assert not self.ws_client.disconnecting
+        assert len(self.ws_client.connections) == 0
+
+    def test_order_book_update_matches_pair_alias(self):
+        self.ws_client._handle_order_book(OrderBook(1, "book-10", "XBT/USD", [], []))
+        self.ws_client._handle_order_book(OrderBook(1, "book-10", "XBT/USD", [], []))
+        assert len(self.ws_client.order_books) == 1
+        update = OrderBook(None, "book-10", "BTC/USD", [Price(Decimal("1"), Decimal("2"), Decimal("3"))], [])
+        self.ws_client._handle_order_book(update)
+        assert self.ws_client.order_books[0].asks == update.asks
+
+    @pytest.mark.asyncio
+    @patch("kraken_web_api.websocket.Handler")
+    async def test_failing_callback_does_not_stop_recieve(self, handler_mock):
+        handler_mock.handle_message.side_effect = [OrderBook(1, "book-10", "ETH/BTC"), OrderBook(2, "book-10", "NANO/ETH")]
+        self.ws_client._on_orderbook_changed = MagicMock(side_effect=ValueError("boom"))
+        await self.ws_client._recieve(AsyncIterator(['', '']))
+        assert len(self.ws_client.order_books) == 2
+        assert self.ws_client._on_orderbook_changed.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch("kraken_web_api.websocket.WebSocket._send_public")
+    @patch("kraken_web_api.websocket.WebSocket._get_public_connection")
+    async def test_book_views_share_subscription_and_filter_updates(self, mock_get_public_connection, mock_send_public):
+        mock_get_public_connection.return_value = MagicMock()
+        top, deep = MagicMock(), MagicMock()
+        top_view = await self.ws_client.subscribe_book_view("XBT/USD", 2, top)
+        deep_view = await self.ws_client.subscribe_book_view("XBT/USD", 10, deep)
+        assert mock_send_public.call_count == 1
+        assert json.loads(mock_send_public.call_args.args[0])["subscription"] == {"name": "book", "depth": 10}
+
+        asks = [Price(Decimal(100 + i), Decimal(1), Decimal(1)) for i in range(5)]
+        bids = [Price(Decimal(99 - i), Decimal(1), Decimal(1)) for i in range(5)]
+        self.ws_client._handle_order_book(OrderBook(1, "book-10", "XBT/USD", asks, bids))
+        assert top.call_count == 1 and deep.call_count == 1
+        assert [p.price for p in top_view.asks] == [Decimal(100), Decimal(101)]
+        assert len(deep_view.bids) == 5
+
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/USD", [Price(Decimal(104), Decimal(2), Decimal(2))], []))
+        assert top.call_count == 1 and deep.call_count == 2
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "XBT/USD", [], [Price(Decimal(99), Decimal(0), Decimal(2))]))
+        assert top.call_count == 2 and deep.call_count == 3
+        top.assert_called_with(top_view)
+        assert top_view.bids[0].price == Decimal(98)
+
+        await self.ws_client.subscribe_book_view("XBT/USD", 20, None)
+        messages = [json.loads(c.args[0]) for c in mock_send_public.call_args_list[1:]]
+        assert [(m["event"], m["subscription"]["depth"]) for m in messages] == [("subscribe", 25), ("unsubscribe", 10)]
+
+        subscription = Subscription(name=SubscriptionType.book, depth=10)
+        self.ws_client._handle_channel(Channel("book-10", "subscriptionStatus", ChannelStatus.subscribed, subscription, "XBT/USD", 1))
+        self.ws_client._handle_channel(Channel("book-10", "subscriptionStatus", ChannelStatus.unsubscribed, subscription, "XBT/USD", 1))
+        assert self.ws_client.order_books[0].provisional
+
+    def test_book_update_is_truncated_to_depth(self):
+        asks = [Price(Decimal(100 + i), Decimal(1), Decimal(1)) for i in range(10)]
+        self.ws_client._handle_order_book(OrderBook(1, "book-10", "ETH/USD", asks, []))
+        self.ws_client._handle_order_book(OrderBook(None, "book-10", "ETH/USD", [Price(Decimal("99.5"), Decimal(1), Decimal(2))], []))
+        book = self.ws_client.order_books[0]
+        assert len(book.asks) == 10
+        assert book.asks[0].price == Decimal("99.5")
+        assert book.asks[-1].price == Decimal(108)